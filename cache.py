@@ -0,0 +1,107 @@
+"""
+Cache persistente en disco para datos de mercado.
+
+El worker refetcha los mismos tickers cada 15 minutos; este módulo evita
+repetir descargas HTTP guardando los DataFrames de yfinance bajo
+``.cache/yfinance`` con un TTL dependiente del intervalo de las velas.
+"""
+from __future__ import annotations
+
+import hashlib
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from config import BASE_DIR, get_logger
+
+logger = get_logger(__name__)
+
+CACHE_DIR = BASE_DIR / ".cache" / "yfinance"
+
+# TTL por intervalo de vela (segundos). Las velas intradía caducan en una
+# ventana de worker; las diarias duran un día.
+DEFAULT_TTL_SECONDS = 15 * 60
+TTL_BY_INTERVAL = {
+    "1m": 5 * 60,
+    "2m": 5 * 60,
+    "5m": 15 * 60,
+    "15m": 15 * 60,
+    "30m": 15 * 60,
+    "60m": 30 * 60,
+    "90m": 30 * 60,
+    "1h": 30 * 60,
+    "1d": 24 * 60 * 60,
+    "5d": 24 * 60 * 60,
+    "1wk": 24 * 60 * 60,
+    "1mo": 24 * 60 * 60,
+}
+
+
+class FileCache:
+    """Cache clave→objeto respaldado por archivos pickle con TTL."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key_to_filename(key: str) -> str:
+        return hashlib.md5(key.encode("utf-8")).hexdigest() + ".pkl"
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / self._key_to_filename(key)
+
+    def get(self, key: str, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> Optional[Any]:
+        """Devuelve el valor cacheado si existe y no expiró; None si no."""
+        path = self._path_for(key)
+        try:
+            if not path.is_file():
+                return None
+            age = time.time() - path.stat().st_mtime
+            if age > ttl_seconds:
+                return None
+            with open(path, "rb") as fp:
+                return pickle.load(fp)
+        except Exception as exc:
+            logger.debug("No se pudo leer cache para %s: %s", key, exc)
+            return None
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Devuelve el valor cacheado aunque haya expirado; None si no existe.
+
+        Útil para refrescos incrementales: un histórico vencido sigue siendo
+        una base válida a la que solo hay que anexarle las velas nuevas.
+        """
+        path = self._path_for(key)
+        try:
+            if not path.is_file():
+                return None
+            with open(path, "rb") as fp:
+                return pickle.load(fp)
+        except Exception as exc:
+            logger.debug("No se pudo leer cache (stale) para %s: %s", key, exc)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Persiste el valor; los errores de escritura solo se loguean."""
+        path = self._path_for(key)
+        try:
+            tmp_path = path.with_suffix(".pkl.tmp")
+            with open(tmp_path, "wb") as fp:
+                pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(path)
+        except Exception as exc:
+            logger.debug("No se pudo escribir cache para %s: %s", key, exc)
+
+    @staticmethod
+    def history_key(symbol: str, period: str, interval: str) -> str:
+        """Clave canónica para históricos de yfinance."""
+        return f"history:{symbol.upper()}:{period}:{interval}"
+
+    @staticmethod
+    def ttl_for_interval(interval: str) -> int:
+        return TTL_BY_INTERVAL.get(interval, DEFAULT_TTL_SECONDS)
+
+
+__all__ = ["FileCache", "CACHE_DIR", "DEFAULT_TTL_SECONDS", "TTL_BY_INTERVAL"]
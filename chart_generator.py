@@ -21,6 +21,7 @@ class ChartGenerator:
         self.config = config
         self.colors = config.get("colors", {})
         self.enable_png = bool(config.get("enable_png_export", True))
+        self.png_scale = float(config.get("png_scale", 1.0))
 
         # Detectar disponibilidad de kaleido una sola vez
         self._kaleido_available = False
@@ -31,6 +32,7 @@ class ChartGenerator:
             self._kaleido_available = True
             version = getattr(kaleido_module, "__version__", "desconocida")
             logger.info(f"Kaleido disponible (versión {version})")
+            self._configure_kaleido_scope()
         except ModuleNotFoundError:
             logger.warning("Kaleido no está instalado; la exportación PNG puede fallar")
         except Exception as exc:
@@ -41,6 +43,25 @@ class ChartGenerator:
                 "La exportación PNG está habilitada en configuración pero kaleido no está disponible; se intentará igualmente y se registrarán errores."
             )
 
+    def _configure_kaleido_scope(self) -> None:
+        """
+        Fija los valores por defecto del scope de kaleido una sola vez.
+
+        Plotly mantiene un subproceso de kaleido persistente; configurarlo aquí
+        evita renegociar dimensiones/escala en cada exportación y permite que
+        ``png_scale`` < 1 reduzca el costo de render y compresión PNG.
+        """
+        try:
+            import plotly.io as pio
+
+            scope = pio.kaleido.scope
+            scope.default_format = "png"
+            scope.default_width = self.config.get("width", 1200)
+            scope.default_height = self.config.get("height", 600)
+            scope.default_scale = self.png_scale
+        except Exception:
+            logger.exception("No se pudo configurar el scope de kaleido; se usarán los defaults de Plotly")
+
     def _export_png_to_bytes(self, fig: go.Figure) -> Optional[bytes]:
         """
         Exporta una figura de Plotly a PNG en memoria como bytes.
@@ -65,7 +86,7 @@ class ChartGenerator:
             
             # Método directo: usar write_image que internamente maneja el buffer
             # Este es el método que funciona correctamente en Heroku
-            img_bytes = fig.to_image(format="png", width=width, height=height)
+            img_bytes = fig.to_image(format="png", width=width, height=height, scale=self.png_scale)
             
             if img_bytes and len(img_bytes) > 0:
                 logger.info(f"✅ PNG generado correctamente ({len(img_bytes)} bytes)")
@@ -112,7 +133,7 @@ class ChartGenerator:
             if ext == '.png':
                 try:
                     # Intentar guardar como PNG directamente
-                    fig.write_image(filepath, width=width, height=height)
+                    fig.write_image(filepath, width=width, height=height, scale=self.png_scale)
                     logger.info(f"✅ Gráfico guardado como PNG: {filepath}")
                     return filepath
                 except Exception as png_error:
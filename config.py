@@ -221,6 +221,9 @@ CHART_CONFIG = {
         "text": "#1f2937",
     },
     "enable_png_export": os.getenv("PORTFOLIO_ENABLE_PNG", "true").lower() == "true",
+    # Factor de escala para la exportación PNG. Valores < 1 reducen los píxeles
+    # a renderizar/comprimir y abaratan la fase de gráficos por usuario.
+    "png_scale": float(os.getenv("PORTFOLIO_PNG_SCALE", "1.0")),
 }
 
 # Archivos de salida (fallback local)
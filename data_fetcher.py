@@ -8,7 +8,9 @@ from __future__ import annotations
 
 import logging
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
@@ -16,6 +18,7 @@ import pandas as pd
 import requests
 import yfinance as yf
 
+from cache import FileCache
 from logo_resolver import resolve_logo_url
 
 logging.basicConfig(level=logging.INFO)
@@ -25,12 +28,155 @@ logger = logging.getLogger(__name__)
 class DataFetcher:
     """Clase para obtener datos de mercado usando yfinance"""
 
+    # TTL de los caches de info/rendimiento semanal: con el procesador
+    # viviendo entre iteraciones del worker, sin expiración los precios
+    # quedarían congelados en la primera corrida.
+    INFO_CACHE_TTL_SECONDS = 300
+    SCRAPE_MIN_INTERVAL = 0.5
+
     def __init__(self):
         self.cache: Dict[str, Any] = {}
+        self._cache_times: Dict[str, float] = {}
         self._weekly_cache: Dict[str, List[float]] = {}
+        self._weekly_cache_times: Dict[str, float] = {}
         self._market_movers_cache: Dict[str, pd.DataFrame] = {}
         self._market_movers_cache_time: Optional[datetime] = None
-    
+        self._history_cache: Dict[tuple, pd.DataFrame] = {}
+        self._history_cache_times: Dict[tuple, float] = {}
+        self._file_cache = FileCache()
+
+        # Sesión HTTP compartida con pool de conexiones: amortiza el
+        # handshake TCP+TLS entre las muchas peticiones pequeñas que
+        # emiten yfinance y el scraping de market movers.
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update(self._REQUEST_HEADERS)
+
+        # Objetos Ticker reutilizados por símbolo: yfinance cachea info e
+        # histórico dentro de la instancia, así que reconstruirla por
+        # llamada tiraba ese estado.
+        self._ticker_cache: Dict[str, yf.Ticker] = {}
+
+        # Throttle del scraping de movers: en vez de un sleep fijo por
+        # llamada, solo se espera si la llamada anterior fue hace menos de
+        # SCRAPE_MIN_INTERVAL segundos. Lock para uso desde varios threads.
+        self._scrape_lock = threading.Lock()
+        self._next_scrape_at = 0.0
+
+    def _throttle_scrape(self) -> None:
+        """Espacia las peticiones de scraping sin dormir de más.
+
+        El ``time.sleep(0.5)`` fijo anterior pagaba medio segundo por
+        llamada aunque la anterior hubiera sido hace minutos. Aquí solo se
+        duerme lo que falte para respetar ``SCRAPE_MIN_INTERVAL`` desde la
+        última petición; el lock serializa la reserva del siguiente turno
+        entre threads.
+        """
+        with self._scrape_lock:
+            now = time.monotonic()
+            wait = self._next_scrape_at - now
+            self._next_scrape_at = max(now, self._next_scrape_at) + self.SCRAPE_MIN_INTERVAL
+        if wait > 0:
+            time.sleep(wait)
+
+    def _cache_entry_fresh(self, times: Dict[str, float], key: str) -> bool:
+        """Indica si una entrada de cache sigue dentro de su TTL."""
+        cached_at = times.get(key)
+        return (
+            cached_at is not None
+            and (time.monotonic() - cached_at) < self.INFO_CACHE_TTL_SECONDS
+        )
+
+    def _history_entry_fresh(self, key: tuple) -> bool:
+        """TTL por intervalo para el cache de históricos en memoria.
+
+        Usa el mismo TTL que el cache en disco: sin esto, el singleton del
+        worker serviría para siempre el histórico de la primera corrida.
+        """
+        cached_at = self._history_cache_times.get(key)
+        return (
+            cached_at is not None
+            and (time.monotonic() - cached_at) < FileCache.ttl_for_interval(key[2])
+        )
+
+    def clear_cache(self) -> None:
+        """Vacía los caches en memoria (útil en tests y recargas)."""
+        self.cache.clear()
+        self._cache_times.clear()
+        self._weekly_cache.clear()
+        self._weekly_cache_times.clear()
+        self._history_cache.clear()
+        self._history_cache_times.clear()
+
+    def _ticker(self, symbol: str) -> yf.Ticker:
+        """Devuelve el Ticker cacheado del símbolo (sesión compartida)."""
+        key = symbol.upper()
+        ticker = self._ticker_cache.get(key)
+        if ticker is None:
+            ticker = yf.Ticker(symbol, session=self._session)
+            self._ticker_cache[key] = ticker
+        return ticker
+
+    def prime_history_cache(self, symbols: List[str], period: str = "6mo", interval: str = "1d") -> None:
+        """
+        Descarga el histórico de varios símbolos en una sola llamada a
+        yfinance y lo deja cacheado para ``get_stock_data``.
+
+        Colapsa N descargas HTTP individuales en un único ``yf.download``
+        (que internamente paraleliza con threads).
+
+        Args:
+            symbols: Lista de símbolos a precargar
+            period: Periodo de tiempo
+            interval: Intervalo de las velas
+        """
+        candidates = {s.upper() for s in symbols if s}
+        # Omitir símbolos con precarga en memoria aún vigente para este periodo
+        unique_symbols = sorted(
+            s for s in candidates if not self._history_entry_fresh((s, period, interval))
+        )
+        if not unique_symbols:
+            return
+
+        try:
+            data = yf.download(
+                unique_symbols,
+                period=period,
+                interval=interval,
+                group_by="ticker",
+                threads=True,
+                progress=False,
+                session=self._session,
+            )
+        except Exception as e:
+            logger.error(f"Error en descarga batch de yfinance: {e}")
+            return
+
+        if data is None or data.empty:
+            logger.warning("La descarga batch de yfinance no devolvió datos.")
+            return
+
+        for symbol in unique_symbols:
+            try:
+                df = data[symbol] if len(unique_symbols) > 1 else data
+            except KeyError:
+                continue
+
+            df = df.dropna(how="all")
+            if df.empty:
+                continue
+
+            self._history_cache[(symbol, period, interval)] = df
+            self._history_cache_times[(symbol, period, interval)] = time.monotonic()
+            self._file_cache.set(FileCache.history_key(symbol, period, interval), df)
+
+        logger.info(
+            "Histórico precargado para %d símbolo(s) en una sola descarga.",
+            len(unique_symbols),
+        )
+
     def get_stock_data(
         self, 
         symbol: str, 
@@ -48,19 +194,103 @@ class DataFetcher:
         Returns:
             DataFrame con los datos históricos
         """
+        memory_key = (symbol.upper(), period, interval)
+        cached = self._history_cache.get(memory_key)
+        if cached is not None and self._history_entry_fresh(memory_key):
+            return cached
+
+        # Cache en disco: sobrevive entre iteraciones del worker y evita
+        # refetchear el mismo histórico cada 15 minutos.
+        cache_key = FileCache.history_key(symbol, period, interval)
+        persisted = self._file_cache.get(cache_key, FileCache.ttl_for_interval(interval))
+        if persisted is not None and not persisted.empty:
+            self._history_cache[memory_key] = persisted
+            self._history_cache_times[memory_key] = time.monotonic()
+            return persisted
+
         try:
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period, interval=interval)
-            
-            if df.empty:
+            ticker = self._ticker(symbol)
+
+            # Refresco incremental: si hay un histórico vencido en disco solo
+            # se bajan las velas desde la última conocida y se anexan, en vez
+            # de refetchear el periodo completo cada iteración del worker.
+            stale = self._file_cache.get_stale(cache_key)
+            df = None
+            if stale is not None and not stale.empty:
+                df = self._refresh_history_delta(ticker, stale, period, interval)
+            if df is None:
+                df = ticker.history(period=period, interval=interval)
+
+            if df is None or df.empty:
                 logger.warning(f"No se encontraron datos para {symbol}")
                 return None
-            
+
+            self._file_cache.set(cache_key, df)
+            self._history_cache[memory_key] = df
+            self._history_cache_times[memory_key] = time.monotonic()
             return df
-        
+
         except Exception as e:
             logger.error(f"Error obteniendo datos para {symbol}: {e}")
             return None
+
+    @staticmethod
+    def _refresh_history_delta(
+        ticker,
+        cached: pd.DataFrame,
+        period: str,
+        interval: str,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Anexa a ``cached`` las velas posteriores a su último timestamp.
+
+        Se pide desde un día antes de la última vela para cubrir velas
+        parciales; los duplicados se resuelven quedándose con la versión
+        más reciente y el resultado se recorta a la ventana del ``period``
+        pedido. Si el fetch incremental falla se devuelve None para que el
+        llamador haga el fetch completo.
+        """
+        try:
+            last_ts = cached.index[-1]
+            new = ticker.history(start=last_ts - pd.Timedelta(days=1), interval=interval)
+            if new is None or new.empty:
+                # Un delta vacío con la última vela reciente es un mercado
+                # sin velas nuevas (fin de semana, premarket). Con una vela
+                # vieja significa que Yahoo ya no sirve ese rango (p. ej.
+                # intradía a más de 60 días): devolver el cache aquí lo
+                # reestamparía como fresco para siempre, así que se fuerza
+                # el fetch completo.
+                max_gap = max(
+                    pd.Timedelta(seconds=3 * FileCache.ttl_for_interval(interval)),
+                    pd.Timedelta(days=4),
+                )
+                now = pd.Timestamp.now(tz=getattr(last_ts, "tz", None))
+                if now - last_ts > max_gap:
+                    return None
+                return cached
+            combined = pd.concat([cached, new])
+            combined = combined[~combined.index.duplicated(keep="last")]
+            return DataFetcher._trim_to_period(combined, period)
+        except Exception as exc:
+            logger.debug("Fetch incremental falló, se hará fetch completo: %s", exc)
+            return None
+
+    @staticmethod
+    def _trim_to_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+        """
+        Recorta ``df`` a la ventana del ``period`` pedido.
+
+        Sin el recorte, el histórico cacheado crecería un delta por
+        iteración y un pedido de "60d" terminaría devolviendo meses de
+        velas a los cálculos y gráficos.
+        """
+        match = re.fullmatch(r"(\d+)(d|mo|y)", period)
+        if not match:
+            # "ytd" y "max" no tienen ventana fija; se devuelven tal cual.
+            return df
+        days_per_unit = {"d": 1, "mo": 30, "y": 365}
+        window = pd.Timedelta(days=int(match.group(1)) * days_per_unit[match.group(2)])
+        return df[df.index >= df.index[-1] - window]
     
     def get_current_price(self, symbol: str) -> Optional[float]:
         """
@@ -80,7 +310,7 @@ class DataFetcher:
                 return price
 
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             info = ticker.info or {}
 
             # Intentar obtener el precio actual de diferentes campos
@@ -104,15 +334,15 @@ class DataFetcher:
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Obtiene información detallada de una acción usando yfinance."""
         cache_key = f"stock_info_{symbol}"
-        
-        # Verificar caché
-        if cache_key in self.cache:
+
+        # Verificar caché (con TTL)
+        if cache_key in self.cache and self._cache_entry_fresh(self._cache_times, cache_key):
             cached = self.cache[cache_key]
             if isinstance(cached, dict) and cached.get("symbol") == symbol:
                 return cached
 
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
 
             # yfinance expone un diccionario ligero en ``info``; si no incluye el logo
             # intentamos enriquecerlo con ``get_info`` que devuelve metadatos adicionales.
@@ -169,6 +399,7 @@ class DataFetcher:
             }
 
             self.cache[cache_key] = result
+            self._cache_times[cache_key] = time.monotonic()
             return result
 
         except Exception as e:
@@ -185,8 +416,169 @@ class DataFetcher:
                 "currency": "USD",
             }
             self.cache[cache_key] = fallback
+            self._cache_times[cache_key] = time.monotonic()
             return fallback
     
+    def get_stock_info_bulk(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene información de varios símbolos colapsando las descargas de
+        precios en una sola llamada HTTP.
+
+        Los símbolos ya cacheados por ``get_stock_info`` se devuelven del
+        cache; para el resto se baja el histórico de 5 días de todos en un
+        único ``yf.download`` y solo los metadatos (nombre, market cap,
+        logo) se piden por símbolo.
+
+        Args:
+            symbols: Lista de símbolos
+
+        Returns:
+            Diccionario {símbolo: info_dict} con el mismo formato que
+            ``get_stock_info``.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: List[str] = []
+        for symbol in sorted({s.upper() for s in symbols if s}):
+            cached = self.cache.get(f"stock_info_{symbol}")
+            if (
+                isinstance(cached, dict)
+                and cached.get("symbol") == symbol
+                and self._cache_entry_fresh(self._cache_times, f"stock_info_{symbol}")
+            ):
+                results[symbol] = cached
+            else:
+                pending.append(symbol)
+
+        if not pending:
+            return results
+
+        closes_by_symbol: Dict[str, pd.Series] = {}
+        try:
+            data = yf.download(
+                pending,
+                period="5d",
+                interval="1d",
+                group_by="ticker",
+                threads=True,
+                progress=False,
+                session=self._session,
+            )
+            if data is not None and not data.empty:
+                for symbol in pending:
+                    try:
+                        df = data[symbol] if len(pending) > 1 else data
+                    except KeyError:
+                        continue
+                    closes = df["Close"].dropna()
+                    if not closes.empty:
+                        closes_by_symbol[symbol] = closes
+        except Exception as e:
+            logger.error(f"Error en descarga batch de precios: {e}")
+
+        tickers = yf.Tickers(" ".join(pending), session=self._session)
+
+        # Los metadatos no tienen endpoint batch en Yahoo; solapar las N
+        # peticiones restantes con un pool de threads (I/O-bound).
+        def _fetch_info(symbol: str) -> Dict[str, Any]:
+            ticker = tickers.tickers[symbol]
+            try:
+                info = ticker.info or {}
+                if info:
+                    return info
+            except Exception as info_error:
+                logger.debug("No se pudo obtener info para %s: %s", symbol, info_error)
+
+            # Fallback liviano: fast_info no trae nombre ni website, pero
+            # cubre los campos numéricos sin el JSON completo de Yahoo.
+            try:
+                fast = ticker.fast_info
+                fields = {
+                    "marketCap": fast.get("market_cap"),
+                    "volume": fast.get("last_volume"),
+                    "exchange": fast.get("exchange"),
+                    "currency": fast.get("currency"),
+                }
+                return {key: value for key, value in fields.items() if value is not None}
+            except Exception as fast_error:
+                logger.debug("fast_info también falló para %s: %s", symbol, fast_error)
+                return {}
+
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+            infos = dict(zip(pending, executor.map(_fetch_info, pending)))
+
+        for symbol in pending:
+            info = infos.get(symbol, {})
+
+            closes = closes_by_symbol.get(symbol)
+            current_price = float(closes.iloc[-1]) if closes is not None else None
+            change_percent = 0.0
+            if closes is not None and len(closes) >= 2:
+                previous_close = float(closes.iloc[-2])
+                if previous_close:
+                    change_percent = ((current_price - previous_close) / previous_close) * 100
+            elif current_price is None:
+                # Mismos campos de respaldo que el camino por símbolo: si la
+                # descarga batch falló o no trajo este símbolo, el precio
+                # sale del info en lugar de quedar en None.
+                fallback_price = info.get('currentPrice') or info.get('regularMarketPrice')
+                if fallback_price is not None:
+                    current_price = float(fallback_price)
+                    previous_close = info.get('previousClose') or info.get('regularMarketPreviousClose')
+                    if previous_close:
+                        change_percent = ((current_price - float(previous_close)) / float(previous_close)) * 100
+
+            if current_price is None:
+                # No cachear ni devolver entradas sin precio: así el
+                # fallback por símbolo del llamador sí se dispara y el
+                # total del portafolio no se subestima durante el TTL.
+                logger.warning("Sin precio en el batch para %s; se omite del cache", symbol)
+                continue
+
+            logo_url = info.get("logo_url") or info.get("logoUrl")
+            if not logo_url:
+                website_url = (
+                    info.get("website")
+                    or info.get("websiteUrl")
+                    or info.get("website_url")
+                )
+                logo_url = resolve_logo_url(symbol, website_url)
+
+            result = {
+                "symbol": symbol,
+                "name": info.get('longName') or info.get('shortName') or symbol,
+                "current_price": current_price,
+                "change_percent": change_percent,
+                "market_cap": info.get('marketCap'),
+                "volume": info.get('volume'),
+                "logo_url": logo_url,
+                "exchange": info.get('exchange'),
+                "currency": info.get('currency', 'USD'),
+            }
+            self.cache[f"stock_info_{symbol}"] = result
+            self._cache_times[f"stock_info_{symbol}"] = time.monotonic()
+            results[symbol] = result
+
+        return results
+
+    def get_weekly_performance_bulk(self, symbols: List[str]) -> Dict[str, Optional[List[float]]]:
+        """
+        Rendimiento semanal de varios símbolos precargando el histórico
+        faltante en una sola descarga batch.
+
+        Returns:
+            Diccionario {símbolo: lista de cierres o None}.
+        """
+        unique_symbols = sorted({s.upper() for s in symbols if s})
+        missing = [
+            s for s in unique_symbols
+            if not self._cache_entry_fresh(self._weekly_cache_times, f"weekly:{s}")
+            and not self._history_entry_fresh((s, "1mo", "1d"))
+        ]
+        if missing:
+            self.prime_history_cache(missing, period="1mo", interval="1d")
+
+        return {s: self.get_weekly_performance(s) for s in unique_symbols}
+
     def get_multiple_stocks_info(self, symbols: List[str]) -> List[Dict]:
         """
         Obtiene información de múltiples acciones
@@ -197,12 +589,12 @@ class DataFetcher:
         Returns:
             Lista de diccionarios con información de cada ticker
         """
-        results = []
-        for symbol in symbols:
-            info = self.get_stock_info(symbol)
-            results.append(info)
-        
-        return results
+        if not symbols:
+            return []
+
+        # Solapar las peticiones por símbolo (I/O-bound) preservando el orden
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+            return list(executor.map(self.get_stock_info, symbols))
     
     def get_historical_data_range(
         self, 
@@ -222,7 +614,7 @@ class DataFetcher:
             DataFrame con los datos históricos
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             df = ticker.history(start=start_date, end=end_date)
             
             if df.empty:
@@ -260,7 +652,9 @@ class DataFetcher:
             Lista de precios de cierre de los últimos 7 días
         """
         cache_key = f"weekly:{symbol.upper()}"
-        if cache_key in self._weekly_cache:
+        if cache_key in self._weekly_cache and self._cache_entry_fresh(
+            self._weekly_cache_times, cache_key
+        ):
             return self._weekly_cache[cache_key]
 
         try:
@@ -272,6 +666,7 @@ class DataFetcher:
             # Obtener los últimos 7 días
             last_7_days = df['Close'].tail(7).tolist()
             self._weekly_cache[cache_key] = last_7_days
+            self._weekly_cache_times[cache_key] = time.monotonic()
             return last_7_days
         
         except Exception as e:
@@ -323,7 +718,7 @@ class DataFetcher:
             return None
 
         try:
-            response = requests.get(url, headers=self._REQUEST_HEADERS, timeout=20)
+            response = self._session.get(url, timeout=20)
             response.raise_for_status()
             
             # Usar StringIO para evitar el FutureWarning de pandas
@@ -385,9 +780,11 @@ class DataFetcher:
             logger.info(f"Usando caché para {mover_type}")
             return self._market_movers_cache[mover_type]
 
-        # Delay para evitar rate limiting
-        time.sleep(0.5)
-        
+        # Throttle para evitar rate limiting: solo espera si la última
+        # petición fue hace menos de SCRAPE_MIN_INTERVAL segundos.
+        self._throttle_scrape()
+
+
         table = self._fetch_market_movers_from_web(mover_type)
         if table is None:
             return None
@@ -0,0 +1,325 @@
+"""
+Servicio HTTP del Portfolio Manager basado en FastAPI.
+
+Expone el último reporte generado (portfolio_data.json) mediante endpoints
+de solo lectura y programa la regeneración periódica durante horario de
+mercado usando APScheduler.
+
+Endpoints:
+    GET  /health    - Estado del servicio
+    GET  /report    - Reporte completo
+    GET  /summary   - Resumen del portafolio
+    GET  /market    - Datos de mercado (market_overview)
+    POST /generate  - Fuerza una regeneración del reporte
+
+Uso:
+    uvicorn fastapi_app:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse
+
+from config import SupabaseConfig, get_logger
+from service_common import (
+    MARKET_TZ,
+    REPORT_PATH,
+    ProcessRequest,
+    generation_file_lock,
+    market_is_open,
+    parse_generated_at,
+)
+
+logger = get_logger(__name__)
+
+# Intervalo de regeneración durante horario de mercado
+GENERATION_INTERVAL_MINUTES = 15
+
+
+@dataclass(slots=True)
+class ReportView:
+    """Vista validada del reporte cargado desde disco.
+
+    Se construye una sola vez por carga con ``.get`` y defaults, de modo
+    que los endpoints no repitan chequeos ``isinstance`` + ``in`` sobre
+    el mismo diccionario.
+    """
+
+    summary: Dict[str, Any] = field(default_factory=dict)
+    market_overview: Dict[str, Any] = field(default_factory=dict)
+    generated_at: Optional[str] = None
+    raw: Optional[Dict[str, Any]] = None
+
+
+# Estado de la última generación (compartido entre scheduler y endpoints)
+last_generation_state: Dict[str, Any] = {
+    "generated_at": None,
+    "status": "pending",
+    "error": None,
+    "last_slot_key": None,
+}
+
+_generation_lock = asyncio.Lock()
+
+
+def _current_slot_key(now: Optional[datetime] = None) -> str:
+    """Clave de idempotencia: ventana de 15 minutos en hora de mercado."""
+    if now is None:
+        now = datetime.now(MARKET_TZ)
+    slot_minute = now.minute - (now.minute % GENERATION_INTERVAL_MINUTES)
+    return f"{now:%Y%m%d%H}{slot_minute:02d}"
+
+
+def _update_last_generation(generated_at: Optional[datetime], status: str = "success") -> None:
+    """Actualiza el estado compartido de la última generación."""
+    last_generation_state["generated_at"] = generated_at
+    last_generation_state["status"] = status
+
+
+def _load_report_from_disk(need_ts: bool = True) -> Optional[ReportView]:
+    """
+    Carga el último reporte desde disco y lo valida en una sola pasada.
+
+    Args:
+        need_ts: si es False se omite el parseo de ``generated_at`` y la
+            actualización del estado de generación; los endpoints que solo
+            devuelven el string crudo no pagan el round-trip de datetime.
+
+    Returns:
+        ReportView con los sub-diccionarios ya extraídos, o None si no
+        hay reporte disponible.
+    """
+    if not REPORT_PATH.is_file():
+        return None
+
+    try:
+        with open(REPORT_PATH, "r", encoding="utf-8") as fp:
+            report = json.load(fp)
+    except Exception as exc:
+        logger.warning("No se pudo leer el reporte local: %s", exc)
+        return None
+
+    if not isinstance(report, dict):
+        return None
+
+    view = ReportView(
+        summary=report.get("summary") or {},
+        market_overview=report.get("market_overview") or {},
+        generated_at=report.get("generated_at"),
+        raw=report,
+    )
+
+    if need_ts:
+        _update_last_generation(parse_generated_at(view.generated_at))
+    return view
+
+
+def _generate_report_sync(period: str = "6mo", user_id: Optional[str] = None) -> Dict[str, Any]:
+    """Ejecuta la generación del reporte (bloqueante, correr en thread).
+
+    El lock de archivo evita que dos procesos del servicio generen sobre
+    el mismo JSON a la vez.
+    """
+    from portfolio_manager import PortfolioManager
+
+    with generation_file_lock() as acquired:
+        if not acquired:
+            raise RuntimeError("Otro proceso está generando el reporte.")
+        manager = PortfolioManager()
+        report = manager.generate_full_report(period=period, user_id=user_id)
+        # El guardado corre en segundo plano; esperarlo dentro del lock
+        # para que la escritura del JSON no escape de la sección crítica
+        # y POST /generate no responda antes de que el reporte sea durable.
+        manager.wait_for_saves()
+        return report
+
+
+async def maybe_generate(
+    force: bool = False,
+    period: str = "6mo",
+    user_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Genera el reporte si está obsoleto (o si ``force`` es True).
+
+    Evita generaciones concurrentes mediante un lock de asyncio y una
+    clave de idempotencia por ventana de 15 minutos: si el scheduler
+    dispara dos veces en la misma ventana (p.ej. tras un reinicio), el
+    segundo disparo es un no-op sin entrar al lock.
+    """
+    slot_key = _current_slot_key()
+    if not force and slot_key == last_generation_state.get("last_slot_key"):
+        logger.info("Ventana %s ya generada; disparo duplicado ignorado.", slot_key)
+        return None
+
+    async with _generation_lock:
+        generated_at = last_generation_state.get("generated_at")
+        if not force and generated_at is not None:
+            age = datetime.now(timezone.utc) - generated_at
+            if age < timedelta(minutes=GENERATION_INTERVAL_MINUTES):
+                logger.info("Reporte aún fresco (%.0fs); se omite generación.", age.total_seconds())
+                return None
+
+        if not force and not market_is_open():
+            logger.info("Mercado cerrado; se omite generación programada.")
+            return None
+
+        try:
+            report = await asyncio.to_thread(_generate_report_sync, period, user_id)
+        except Exception as exc:
+            logger.error("Error generando reporte: %s", exc, exc_info=True)
+            last_generation_state["status"] = "error"
+            last_generation_state["error"] = str(exc)
+            return None
+
+        _update_last_generation(parse_generated_at(report.get("generated_at")))
+        last_generation_state["error"] = None
+        last_generation_state["last_slot_key"] = slot_key
+        return report
+
+
+def initialize_last_generation() -> None:
+    """Inicializa el estado de generación a partir del reporte en disco."""
+    view = _load_report_from_disk()
+    if view is None:
+        logger.info("No hay reporte previo en disco.")
+        _update_last_generation(None, status="pending")
+
+
+# orjson serializa datetimes, dataclasses y escalares numpy de forma nativa
+# y es varias veces más rápido que el encoder JSON de stdlib.
+app = FastAPI(
+    title="Portfolio Manager Service",
+    version="2.1",
+    default_response_class=ORJSONResponse,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+scheduler = AsyncIOScheduler(timezone=MARKET_TZ)
+
+# Mitad estática del payload de /health: la configuración de Supabase no
+# cambia en vida del proceso, así que se construye una sola vez.
+_HEALTH_STATIC = {
+    "supabase": {
+        "configured": SupabaseConfig.is_configured(),
+        "bucket": SupabaseConfig.SUPABASE_BUCKET_NAME,
+        "data_prefix": SupabaseConfig.SUPABASE_BASE_PREFIX,
+        "charts_prefix": SupabaseConfig.SUPABASE_BASE_PREFIX2,
+    },
+}
+
+
+@app.on_event("startup")
+async def on_startup() -> None:
+    """Carga el estado inicial y arranca el scheduler.
+
+    La primera generación se lanza como tarea de fondo para que el
+    servicio acepte conexiones de inmediato; /report y /summary devuelven
+    ``no_data`` hasta que termine.
+    """
+    initialize_last_generation()
+    asyncio.create_task(maybe_generate(force=False))
+    app.state.ready = True
+
+    scheduler.add_job(
+        maybe_generate,
+        CronTrigger(
+            day_of_week="mon-fri",
+            hour="9-16",
+            minute=f"*/{GENERATION_INTERVAL_MINUTES}",
+            timezone=MARKET_TZ,
+        ),
+        id="report_generation",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=None,
+    )
+    scheduler.start()
+    logger.info("Servicio iniciado; scheduler activo.")
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+
+
+@app.get("/health")
+async def health() -> Dict[str, Any]:
+    """Estado del servicio para probes de liveness/readiness."""
+    generated_at = last_generation_state.get("generated_at")
+    return {
+        "status": "ok",
+        "ready": getattr(app.state, "ready", False),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "market_open": market_is_open(),
+        "last_generation": {
+            "generated_at": generated_at.isoformat() if generated_at else None,
+            "status": last_generation_state.get("status"),
+            "error": last_generation_state.get("error"),
+        },
+        **_HEALTH_STATIC,
+    }
+
+
+@app.get("/report")
+async def get_report():
+    """Devuelve el reporte completo más reciente.
+
+    El archivo en disco ya es JSON válido, así que se sirve tal cual con
+    ``FileResponse`` (sendfile donde esté disponible) en lugar de
+    parsearlo y re-serializarlo. Solo /summary y /market necesitan
+    acceder a sub-campos del diccionario.
+    """
+    if not REPORT_PATH.is_file():
+        return {"status": "no_data", "report": None}
+    return FileResponse(REPORT_PATH, media_type="application/json")
+
+
+@app.get("/summary")
+async def get_summary() -> Dict[str, Any]:
+    """Devuelve el resumen del portafolio."""
+    view = _load_report_from_disk(need_ts=False)
+    if view is None:
+        return {"status": "no_data", "summary": None, "generated_at": None}
+    return {
+        "status": "success" if view.summary else "no_data",
+        "summary": view.summary,
+        "generated_at": view.generated_at,
+    }
+
+
+@app.get("/market")
+async def get_market() -> Dict[str, Any]:
+    """Devuelve la sección de mercado (market_overview)."""
+    view = _load_report_from_disk(need_ts=False)
+    if view is None:
+        return {"status": "no_data", "market_overview": None, "generated_at": None}
+    return {
+        "status": "success" if view.market_overview else "no_data",
+        "market_overview": view.market_overview,
+        "generated_at": view.generated_at,
+    }
+
+
+@app.post("/generate")
+async def generate(request: ProcessRequest) -> Dict[str, Any]:
+    """Fuerza una regeneración del reporte."""
+    report = await maybe_generate(force=True, period=request.period, user_id=request.user_id)
+    if report is None:
+        return {"status": "error", "error": last_generation_state.get("error")}
+    return {"status": "success", "generated_at": report.get("generated_at")}
@@ -8,15 +8,18 @@ construye URLs que pueden ser consumidas por el frontend.
 """
 from __future__ import annotations
 
+import sys
 from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional
-from urllib.parse import urlparse
 
 CLEARBIT_BASE_URL = "https://logo.clearbit.com/{domain}"
 
 # Conjunto de símbolos que usamos habitualmente en los dashboards. Los
-# dominios provienen de las fuentes oficiales de cada compañía.
-SYMBOL_DOMAIN_OVERRIDES = {
+# dominios provienen de las fuentes oficiales de cada compañía. Las claves
+# se internan (los tickers son strings repetidos en todo el proceso) y el
+# mapping se expone como vista de solo lectura.
+_SYMBOL_DOMAIN_OVERRIDES = {
     "AAPL": "apple.com",
     "TSLA": "tesla.com",
     "MSFT": "microsoft.com",
@@ -39,29 +42,65 @@ SYMBOL_DOMAIN_OVERRIDES = {
     "CVX": "chevron.com",
 }
 
+SYMBOL_DOMAIN_OVERRIDES = MappingProxyType({
+    sys.intern(symbol): domain for symbol, domain in _SYMBOL_DOMAIN_OVERRIDES.items()
+})
+
 
 def _normalize_domain(raw_url: str) -> Optional[str]:
-    """Extrae un dominio normalizado a partir de una URL genérica."""
+    """Extrae un dominio normalizado a partir de una URL genérica.
+
+    Solo necesitamos el hostname, así que se evita ``urlparse`` (construye
+    un ParseResult completo con query/fragment que nunca usamos) en favor
+    de cortes de string directos: quitar esquema, cortar en el primer
+    separador de ruta y descartar credenciales/puerto.
+    """
     if not raw_url:
         return None
 
-    raw_url = raw_url.strip()
-    if not raw_url:
+    host = raw_url.strip().lower()
+    if not host:
         return None
 
-    parsed = urlparse(raw_url if raw_url.startswith(("http://", "https://")) else f"https://{raw_url}")
-    hostname = parsed.hostname
+    # Camino rápido: el campo ``website`` de yfinance suele venir como
+    # dominio pelado ("apple.com"); sin esquema ni ruta no hay nada que cortar.
+    if not any(sep in host for sep in "/:?#@"):
+        if host.startswith("www."):
+            host = host[4:]
+        return host or None
 
-    if not hostname:
-        return None
+    host = host.split("://", 1)[-1]
+    host = host.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    host = host.split("@")[-1].split(":", 1)[0]
+
+    if host.startswith("www."):
+        host = host[4:]
 
-    if hostname.startswith("www."):
-        hostname = hostname[4:]
+    return host or None
 
-    return hostname.lower()
+
+# URLs precomputadas para los símbolos conocidos: el camino caliente del
+# dashboard se resuelve con un solo dict.get, sin format() ni normalización.
+_PRECOMPUTED_URLS = {
+    symbol: CLEARBIT_BASE_URL.format(domain=domain)
+    for symbol, domain in SYMBOL_DOMAIN_OVERRIDES.items()
+}
+
+
+@lru_cache(maxsize=4096)
+def _resolve_logo_url_cached(symbol: str, website: Optional[str]) -> Optional[str]:
+    """Resolución cacheada; espera claves ya normalizadas."""
+    domain = SYMBOL_DOMAIN_OVERRIDES.get(symbol)
+
+    if not domain:
+        domain = _normalize_domain(website or "")
+
+    if not domain:
+        return None
+
+    return CLEARBIT_BASE_URL.format(domain=domain)
 
 
-@lru_cache(maxsize=None)
 def resolve_logo_url(symbol: str, website: Optional[str] = None) -> Optional[str]:
     """Devuelve una URL de logo para ``symbol``.
 
@@ -69,6 +108,10 @@ def resolve_logo_url(symbol: str, website: Optional[str] = None) -> Optional[str
     1. Dominio conocido en ``SYMBOL_DOMAIN_OVERRIDES``.
     2. Dominio derivado del parámetro ``website``.
 
+    La clave se normaliza ANTES del lookup en cache para que ``"aapl"`` y
+    ``"AAPL"`` compartan entrada, y el cache está acotado (4096 entradas)
+    para que un backend de larga vida no crezca sin límite.
+
     Args:
         symbol: ticker bursátil (insensible a mayúsculas/minúsculas).
         website: URL del sitio oficial proveniente de yfinance (opcional).
@@ -80,19 +123,23 @@ def resolve_logo_url(symbol: str, website: Optional[str] = None) -> Optional[str
     if not symbol:
         return None
 
-    normalized_symbol = symbol.strip().upper()
+    # Camino rápido: símbolo conocido → URL precomputada, sin strip ni cache.
+    hit = _PRECOMPUTED_URLS.get(symbol.upper())
+    if hit:
+        return hit
+
+    normalized_symbol = sys.intern(symbol.strip().upper())
     if not normalized_symbol:
         return None
 
-    domain = SYMBOL_DOMAIN_OVERRIDES.get(normalized_symbol)
+    normalized_website = website.strip().lower() if website else None
 
-    if not domain:
-        domain = _normalize_domain(website or "")
+    return _resolve_logo_url_cached(normalized_symbol, normalized_website)
 
-    if not domain:
-        return None
 
-    return CLEARBIT_BASE_URL.format(domain=domain)
+# Diagnóstico del cache (hit rate, tamaño) para endpoints de salud.
+resolve_logo_url.cache_info = _resolve_logo_url_cached.cache_info
+resolve_logo_url.cache_clear = _resolve_logo_url_cached.cache_clear
 
 
 __all__ = ["resolve_logo_url", "SYMBOL_DOMAIN_OVERRIDES"]
@@ -12,9 +12,12 @@ import argparse
 import logging
 import sys
 from typing import List, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
+from operator import itemgetter
 import random
 
+import numpy as np
+
 from supabase_client import SupabaseDBClient
 from config import get_logger
 
@@ -45,7 +48,38 @@ class TestDataPopulator:
     def __init__(self):
         """Inicializa el cliente de Supabase."""
         self.client = SupabaseDBClient()._get_client()
+        # Generador vectorizado: un draw en C por columna en lugar de un
+        # random.choice por fila.
+        self._rng = np.random.default_rng()
     
+    def _bulk_insert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Inserta filas en lotes de ``chunk_size``.
+
+        Mantiene pocas llamadas HTTP (una por lote, no por fila) sin
+        arriesgar un 413 de PostgREST cuando el payload supera el límite
+        del body.
+
+        Args:
+            table: Nombre de la tabla
+            rows: Filas a insertar
+            chunk_size: Filas por lote
+
+        Returns:
+            Filas devueltas por la base, en el orden de inserción
+        """
+        inserted: List[Dict[str, Any]] = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            response = self.client.table(table).insert(chunk).execute()
+            inserted.extend(response.data)
+        return inserted
+
     def generate_test_users(self, count: int) -> List[Dict[str, Any]]:
         """
         Genera datos de usuarios de prueba.
@@ -56,25 +90,33 @@ class TestDataPopulator:
         Returns:
             Lista de diccionarios con datos de usuarios
         """
+        # Todas las columnas aleatorias en draws vectorizados
+        firsts = self._rng.choice(self.FIRST_NAMES, size=count)
+        lasts = self._rng.choice(self.LAST_NAMES, size=count)
+        ages = self._rng.integers(25, 66, size=count)
+        genders = self._rng.choice(["male", "female"], size=count)
+
+        # Fechas de nacimiento como columna datetime64: la resta y el
+        # formateo ISO se hacen vectorizados, sin datetime/isoformat por fila.
+        today = np.datetime64(datetime.now().date())
+        age_days = (ages * 365).astype("timedelta64[D]")
+        birth_dates = np.datetime_as_string(today - age_days, unit="D")
+
         users = []
-        
-        for i in range(count):
-            first = random.choice(self.FIRST_NAMES)
-            last = random.choice(self.LAST_NAMES)
+
+        for i, (first, last, birth_date, gender) in enumerate(
+            zip(firsts, lasts, birth_dates, genders)
+        ):
             email = f"{first.lower()}.{last.lower()}{i}@example.com"
-            
-            # Fecha de nacimiento aleatoria (25-65 años)
-            age = random.randint(25, 65)
-            birth_date = datetime.now() - timedelta(days=age*365)
-            
+
             users.append({
-                "first_name": first,
-                "last_name": last,
+                "first_name": str(first),
+                "last_name": str(last),
                 "email": email,
-                "birth_date": birth_date.date().isoformat(),
-                "gender": random.choice(["male", "female"])
+                "birth_date": str(birth_date),
+                "gender": str(gender)
             })
-        
+
         return users
     
     def insert_users(self, users: List[Dict[str, Any]]) -> List[str]:
@@ -90,9 +132,10 @@ class TestDataPopulator:
         logger.info(f"Insertando {len(users)} usuarios...")
         
         try:
-            response = self.client.table("users").insert(users).execute()
-            
-            user_ids = [user.get("user_id") for user in response.data]
+            inserted = self._bulk_insert("users", users)
+
+            # itemgetter: extracción a nivel C; PostgREST siempre devuelve la PK
+            user_ids = list(map(itemgetter("user_id"), inserted))
             logger.info(f"✓ {len(user_ids)} usuarios insertados correctamente")
             
             return user_ids
@@ -145,9 +188,9 @@ class TestDataPopulator:
         logger.info(f"Insertando {len(portfolios)} portfolios...")
         
         try:
-            response = self.client.table("portfolios").insert(portfolios).execute()
-            
-            portfolio_ids = [p.get("portfolio_id") for p in response.data]
+            inserted = self._bulk_insert("portfolios", portfolios)
+
+            portfolio_ids = list(map(itemgetter("portfolio_id"), inserted))
             logger.info(f"✓ {len(portfolio_ids)} portfolios insertados")
             
             return portfolio_ids
@@ -174,27 +217,28 @@ class TestDataPopulator:
         if count is None:
             count = random.randint(3, 8)
         
-        # Seleccionar symbols únicos
-        selected_symbols = random.sample(self.STOCK_SYMBOLS, min(count, len(self.STOCK_SYMBOLS)))
-        
+        # Symbols únicos y columnas numéricas en draws vectorizados
+        size = min(count, len(self.STOCK_SYMBOLS))
+        selected_symbols = self._rng.choice(self.STOCK_SYMBOLS, size=size, replace=False)
+        quantities = self._rng.uniform(5, 50, size=size).round(2)
+        prices = self._rng.uniform(50, 500, size=size).round(2)
+        days_ago = self._rng.integers(0, 731, size=size).astype("timedelta64[D]")
+
+        # Fechas de adquisición vectorizadas (ver generate_test_users)
+        today = np.datetime64(datetime.now().date())
+        acq_dates = np.datetime_as_string(today - days_ago, unit="D")
+
         assets = []
-        
-        for symbol in selected_symbols:
-            quantity = round(random.uniform(5, 50), 2)
-            price = round(random.uniform(50, 500), 2)
-            
-            # Fecha de adquisición (últimos 2 años)
-            days_ago = random.randint(0, 730)
-            acq_date = datetime.now() - timedelta(days=days_ago)
-            
+
+        for symbol, quantity, price, acq_date in zip(selected_symbols, quantities, prices, acq_dates):
             assets.append({
                 "portfolio_id": portfolio_id,
-                "asset_symbol": symbol,
-                "quantity": quantity,
-                "acquisition_price": price,
-                "acquisition_date": acq_date.date().isoformat()
+                "asset_symbol": str(symbol),
+                "quantity": float(quantity),
+                "acquisition_price": float(price),
+                "acquisition_date": str(acq_date)
             })
-        
+
         return assets
     
     def insert_assets(self, assets: List[Dict[str, Any]]) -> List[int]:
@@ -210,9 +254,9 @@ class TestDataPopulator:
         logger.info(f"Insertando {len(assets)} assets...")
         
         try:
-            response = self.client.table("assets").insert(assets).execute()
-            
-            asset_ids = [a.get("asset_id") for a in response.data]
+            inserted = self._bulk_insert("assets", assets)
+
+            asset_ids = list(map(itemgetter("asset_id"), inserted))
             logger.info(f"✓ {len(asset_ids)} assets insertados")
             
             return asset_ids
@@ -247,26 +291,28 @@ class TestDataPopulator:
             users_data = self.generate_test_users(num_users)
             user_ids = self.insert_users(users_data)
             summary["users_created"] = len(user_ids)
-            
-            # 2. Para cada usuario, crear portfolios y assets
-            for user_id in user_ids:
-                try:
-                    # Crear portfolios
-                    portfolios_data = self.generate_portfolios_for_user(user_id)
-                    portfolio_ids = self.insert_portfolios(portfolios_data)
-                    summary["portfolios_created"] += len(portfolio_ids)
-                    
-                    # Para cada portfolio, crear assets
-                    for portfolio_id in portfolio_ids:
-                        assets_data = self.generate_assets_for_portfolio(portfolio_id)
-                        asset_ids = self.insert_assets(assets_data)
-                        summary["assets_created"] += len(asset_ids)
-                
-                except Exception as e:
-                    error_msg = f"Error procesando usuario {user_id}: {e}"
-                    logger.error(error_msg)
-                    summary["errors"].append(error_msg)
-            
+
+            # 2. Generar TODOS los portfolios y mandarlos en un solo insert:
+            # 3 round-trips a PostgREST en total en vez de 1 por usuario +
+            # 1 por portfolio.
+            all_portfolios = [
+                portfolio
+                for user_id in user_ids
+                for portfolio in self.generate_portfolios_for_user(user_id)
+            ]
+            portfolio_ids = self.insert_portfolios(all_portfolios)
+            summary["portfolios_created"] = len(portfolio_ids)
+
+            # 3. Generar todos los assets contra los ids devueltos y un solo
+            # insert masivo (PostgREST preserva el orden del payload).
+            all_assets = [
+                asset
+                for portfolio_id in portfolio_ids
+                for asset in self.generate_assets_for_portfolio(portfolio_id)
+            ]
+            asset_ids = self.insert_assets(all_assets)
+            summary["assets_created"] = len(asset_ids)
+
             logger.info("\n" + "=" * 70)
             logger.info("RESUMEN DE POBLACIÓN")
             logger.info("=" * 70)
@@ -288,20 +334,32 @@ class TestDataPopulator:
         Solo usar en entorno de testing.
         """
         logger.warning("⚠️  ELIMINANDO TODOS LOS DATOS DE PRUEBA...")
-        
+
+        # Camino rápido: un solo round-trip que trunca las tres tablas en
+        # cascada del lado del servidor. Requiere la función:
+        #   CREATE FUNCTION truncate_test_data() RETURNS void AS
+        #   $$ TRUNCATE assets, portfolios, users RESTART IDENTITY CASCADE $$
+        #   LANGUAGE sql SECURITY DEFINER;
+        try:
+            self.client.rpc("truncate_test_data").execute()
+            logger.info("✓ Limpieza completada (TRUNCATE en cascada)")
+            return
+        except Exception as e:
+            logger.warning(f"RPC truncate_test_data no disponible ({e}); usando deletes por tabla.")
+
         try:
             # Eliminar en orden por dependencias
             self.client.table("assets").delete().neq("asset_id", 0).execute()
             logger.info("✓ Assets eliminados")
-            
+
             self.client.table("portfolios").delete().neq("portfolio_id", 0).execute()
             logger.info("✓ Portfolios eliminados")
-            
+
             self.client.table("users").delete().neq("user_id", "00000000-0000-0000-0000-000000000000").execute()
             logger.info("✓ Usuarios eliminados")
-            
+
             logger.info("✓ Limpieza completada")
-        
+
         except Exception as e:
             logger.error(f"Error limpiando datos: {e}")
             raise
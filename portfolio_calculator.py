@@ -1,9 +1,11 @@
 """
 Módulo para realizar cálculos del portafolio
 """
+import heapq
+
 import pandas as pd
 import numpy as np
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
@@ -12,6 +14,41 @@ from data_fetcher import DataFetcher
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Factor de anualización (días hábiles) precomputado una sola vez
+_SQRT_252 = float(np.sqrt(252))
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba es opcional
+    njit = None
+
+
+def _returns_stats_python(returns: np.ndarray) -> Tuple[float, float, float]:
+    """Suma, suma de cuadrados y max drawdown en una pasada."""
+    sum_r = 0.0
+    sum_sq = 0.0
+    cumulative = 1.0
+    peak = 1.0
+    max_dd = 0.0
+    for r in returns:
+        sum_r += r
+        sum_sq += r * r
+        cumulative *= 1.0 + r
+        if cumulative > peak:
+            peak = cumulative
+        drawdown = (cumulative - peak) / peak
+        if drawdown < max_dd:
+            max_dd = drawdown
+    return sum_r, sum_sq, max_dd
+
+
+if njit is not None:
+    # Kernel fusionado: una sola pasada por el array en código compilado,
+    # sin los intermedios de cumprod/maximum.accumulate/divide.
+    _returns_stats = njit(cache=True, fastmath=True)(_returns_stats_python)
+else:
+    _returns_stats = None
+
 
 class PortfolioCalculator:
     """Clase para realizar cálculos del portafolio"""
@@ -19,6 +56,17 @@ class PortfolioCalculator:
     def __init__(self, data_fetcher: DataFetcher):
         self.data_fetcher = data_fetcher
     
+    def _prefetch_maps(
+        self, symbols: List[str]
+    ) -> Tuple[Dict[str, Dict], Dict[str, Optional[List[float]]]]:
+        """Ejecuta los dos prefetch batch (info y semanal) en paralelo."""
+        if not symbols:
+            return {}, {}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            info_future = executor.submit(self.data_fetcher.get_stock_info_bulk, symbols)
+            weekly_future = executor.submit(self.data_fetcher.get_weekly_performance_bulk, symbols)
+            return info_future.result(), weekly_future.result()
+
     def calculate_portfolio_value(self, assets: List[Dict]) -> Dict:
         """
         Calcula el valor total del portafolio y métricas
@@ -29,49 +77,70 @@ class PortfolioCalculator:
         Returns:
             Diccionario con métricas del portafolio
         """
-        total_value = 0.0
         total_change = 0.0
-        total_change_absolute = 0.0
-        assets_data = []
-        
+
+        # Prefetch masivo: 2 llamadas batch en vez de 2 llamadas HTTP por
+        # asset, y además solapadas entre sí (ambas son I/O independiente).
+        symbols = [asset["symbol"] for asset in assets]
+        info_map, weekly_map = self._prefetch_maps(symbols)
+
+        # Primera pasada: solo recolectar escalares de los assets con
+        # precio válido. La aritmética de posiciones se hace después de
+        # forma vectorizada sobre arrays numpy, no dentro del loop.
+        valid: List[tuple] = []
         for asset in assets:
             symbol = asset["symbol"]
-            units = asset["units"]
-            
-            info = self.data_fetcher.get_stock_info(symbol)
-            
+            info = info_map.get(symbol.upper()) or self.data_fetcher.get_stock_info(symbol)
+
             if info["current_price"] is None:
                 logger.warning(f"No se pudo obtener precio para {symbol}")
                 continue
-            
-            position_value = info["current_price"] * units
+
             raw_change_percent = info.get("change_percent")
             change_percent = float(raw_change_percent) if isinstance(raw_change_percent, (int, float)) else 0.0
-            position_change = position_value * (change_percent / 100)
-            
-            total_value += position_value
-            total_change_absolute += position_change
-            
-            # Obtener datos de rendimiento semanal para sparklines
-            weekly_perf = self.data_fetcher.get_weekly_performance(symbol)
-            
+            valid.append((symbol, asset["units"], float(info["current_price"]), change_percent, info))
+
+        if valid:
+            units_arr = np.fromiter((v[1] for v in valid), dtype=np.float64, count=len(valid))
+            prices_arr = np.fromiter((v[2] for v in valid), dtype=np.float64, count=len(valid))
+            changes_arr = np.fromiter((v[3] for v in valid), dtype=np.float64, count=len(valid))
+
+            position_values = prices_arr * units_arr
+            position_changes = position_values * (changes_arr / 100.0)
+
+            total_value = float(position_values.sum())
+            total_change_absolute = float(position_changes.sum())
+
+            # Valor al cierre anterior, acumulado directamente; evita
+            # reconstruirlo después restando dos totales cercanos.
+            denominators = 1.0 + changes_arr / 100.0
+            positive = denominators > 0
+            total_previous_value = float((position_values[positive] / denominators[positive]).sum())
+        else:
+            position_values = position_changes = np.empty(0)
+            total_value = total_change_absolute = total_previous_value = 0.0
+
+        assets_data = []
+        for (symbol, units, price, change_percent, info), position_value, position_change in zip(
+            valid, position_values, position_changes
+        ):
             assets_data.append({
                 "symbol": symbol,
                 "name": info["name"],
                 "units": units,
                 "current_price": info["current_price"],
-                "position_value": position_value,
+                "position_value": float(position_value),
                 "change_percent": change_percent,
-                "change_absolute": position_change,
+                "change_absolute": float(position_change),
                 "logo_url": info.get("logo_url"),
                 "market_cap": info["market_cap"],
                 "volume": info["volume"],
-                "weekly_performance": weekly_perf,
+                # Rendimiento semanal para sparklines (del prefetch batch)
+                "weekly_performance": weekly_map.get(symbol.upper()),
             })
-        
-        previous_total = total_value - total_change_absolute
-        if previous_total > 0:
-            total_change = (total_change_absolute / previous_total) * 100
+
+        if total_previous_value > 0:
+            total_change = (total_value - total_previous_value) / total_previous_value * 100
         
         return {
             "total_value": total_value,
@@ -96,29 +165,43 @@ class PortfolioCalculator:
         Returns:
             DataFrame con el rendimiento del portafolio
         """
-        portfolio_values = None
-        
+        # Recolectar los cierres de cada asset y alinear índices UNA sola
+        # vez con pd.concat, en lugar de un Series.add (re-alineación +
+        # Series nueva) por asset. La suma ponderada por unidades se hace
+        # como producto matricial en una pasada.
+        close_series: Dict[str, pd.Series] = {}
+        units_by_symbol: Dict[str, float] = {}
+
+        # Precargar todos los históricos en una sola descarga batch; el
+        # loop siguiente queda en hits de cache (con fallback por símbolo
+        # dentro de get_stock_data para los que falten).
+        self.data_fetcher.prime_history_cache(
+            [asset["symbol"] for asset in assets], period=period
+        )
+
         for asset in assets:
             symbol = asset["symbol"]
             units = asset["units"]
-            
+
             hist_data = self.data_fetcher.get_stock_data(symbol, period=period)
-            
+
             if hist_data is None or hist_data.empty:
                 logger.warning(f"No se encontraron datos históricos para {symbol}")
                 continue
-            
-            # Calcular valor de la posición
-            position_values = hist_data['Close'] * units
-            
-            if portfolio_values is None:
-                portfolio_values = position_values
-            else:
-                # Alinear índices y sumar
-                portfolio_values = portfolio_values.add(position_values, fill_value=0)
-        
-        if portfolio_values is None:
+
+            # Sumar unidades si el símbolo aparece repetido entre portfolios
+            units_by_symbol[symbol] = units_by_symbol.get(symbol, 0.0) + float(units)
+            close_series[symbol] = hist_data['Close']
+
+        if not close_series:
             return pd.DataFrame()
+
+        closes = pd.DataFrame(close_series).sort_index().fillna(0.0)
+        units_vector = np.array(
+            [units_by_symbol[symbol] for symbol in closes.columns],
+            dtype=np.float64,
+        )
+        portfolio_values = pd.Series(closes.to_numpy() @ units_vector, index=closes.index)
         
         # Convertir a DataFrame
         df = pd.DataFrame({
@@ -130,21 +213,34 @@ class PortfolioCalculator:
         
         return df
     
-    def get_top_gainers_losers(self, assets_data: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    def get_top_gainers_losers(
+        self,
+        assets_data: List[Dict],
+        top_k: int = 10
+    ) -> Tuple[List[Dict], List[Dict]]:
         """
         Identifica los mayores ganadores y perdedores
-        
+
         Args:
             assets_data: Lista de datos de activos
-        
+            top_k: Máximo de elementos por lista
+
         Returns:
-            Tupla con (ganadores, perdedores)
+            Tupla con (ganadores, perdedores); perdedores peor-primero
         """
-        sorted_by_change = sorted(assets_data, key=lambda x: x["change_percent"], reverse=True)
-        
-        gainers = [asset for asset in sorted_by_change if asset["change_percent"] > 0]
-        losers = [asset for asset in sorted_by_change if asset["change_percent"] < 0]
-        
+        # Selección parcial O(N log K) en vez de ordenar la lista completa:
+        # el reporte solo consume los primeros elementos de cada lado.
+        gainers = heapq.nlargest(
+            top_k,
+            (asset for asset in assets_data if asset["change_percent"] > 0),
+            key=lambda asset: asset["change_percent"],
+        )
+        losers = heapq.nsmallest(
+            top_k,
+            (asset for asset in assets_data if asset["change_percent"] < 0),
+            key=lambda asset: asset["change_percent"],
+        )
+
         return gainers, losers
     
     def calculate_asset_allocation(self, assets_data: List[Dict]) -> List[Dict]:
@@ -157,17 +253,27 @@ class PortfolioCalculator:
         Returns:
             Lista de activos con porcentaje de participación
         """
-        total_value = sum(asset["position_value"] for asset in assets_data)
-        
-        allocation = []
-        for asset in assets_data:
-            percentage = (asset["position_value"] / total_value * 100) if total_value > 0 else 0
-            allocation.append({
-                **asset,
-                "allocation_percent": percentage
-            })
-        
-        return allocation
+        if not assets_data:
+            return assets_data
+
+        # Vectorizar la división y anotar in place: el spread {**asset}
+        # copiaba cada registro completo (incluidos los arrays de
+        # weekly_performance) solo para añadir un campo.
+        values = np.fromiter(
+            (asset["position_value"] for asset in assets_data),
+            dtype=np.float64,
+            count=len(assets_data),
+        )
+        total_value = values.sum()
+        if total_value > 0:
+            percentages = values / total_value * 100.0
+        else:
+            percentages = np.zeros_like(values)
+
+        for asset, percentage in zip(assets_data, percentages):
+            asset["allocation_percent"] = float(percentage)
+
+        return assets_data
     
     def calculate_portfolio_metrics(self, performance_df: pd.DataFrame) -> Dict:
         """
@@ -207,15 +313,37 @@ class PortfolioCalculator:
             }
 
         total_return = ((values[-1] - values[0]) / values[0] * 100) if values[0] != 0 else 0.0
-        volatility = float(np.std(returns, ddof=1) * np.sqrt(252) * 100) if returns.size > 1 else 0.0
-        mean_return = float(np.mean(returns))
-        std_return = float(np.std(returns, ddof=1)) if returns.size > 1 else 0.0
-        sharpe_ratio = (mean_return / std_return * np.sqrt(252)) if std_return > 0 else 0.0
 
-        cumulative = np.cumprod(1 + returns)
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = np.divide(cumulative - running_max, running_max, out=np.zeros_like(cumulative), where=running_max != 0)
-        max_drawdown = float(np.min(drawdown) * 100) if drawdown.size else 0.0
+        # Media y varianza en una pasada (suma + producto punto) en vez de
+        # np.mean más dos np.std separados sobre el mismo array. Con numba
+        # instalado, el drawdown se fusiona en la misma pasada compilada.
+        n = returns.size
+        if _returns_stats is not None:
+            sum_r, sum_squares, max_dd_ratio = _returns_stats(returns)
+            mean_return = sum_r / n
+            max_drawdown = max_dd_ratio * 100
+        else:
+            mean_return = float(returns.sum()) / n
+            sum_squares = float(np.dot(returns, returns))
+            # Drawdown reutilizando buffers: 'returns' ya no se necesita
+            # (suma y producto punto extraídos arriba), así que las
+            # operaciones encadenadas escriben in-place con out= en lugar
+            # de materializar cumulative/running_max/ratio por separado.
+            running_max = np.empty_like(returns)
+            np.add(returns, 1.0, out=returns)
+            np.multiply.accumulate(returns, out=returns)        # cumulative
+            np.maximum.accumulate(returns, out=running_max)
+            np.divide(returns, running_max, out=returns, where=running_max != 0)
+            returns[running_max == 0] = 1.0                     # ratio neutro
+            max_drawdown = float((returns.min() - 1.0) * 100)
+
+        if n > 1:
+            variance = max(sum_squares - n * mean_return * mean_return, 0.0) / (n - 1)
+            std_return = float(np.sqrt(variance))
+        else:
+            std_return = 0.0
+        volatility = std_return * _SQRT_252 * 100
+        sharpe_ratio = (mean_return / std_return * _SQRT_252) if std_return > 0 else 0.0
 
         return {
             "total_return_percent": float(total_return) if np.isfinite(total_return) else 0.0,
@@ -262,23 +390,57 @@ class PortfolioCalculator:
         }
 
         def upsert(target: str, symbol: str, payload: Dict[str, Any]) -> None:
-            existing = market_data_map[target].get(symbol, {})
-            merged = {**existing, **{k: v for k, v in payload.items() if v is not None}}
-            market_data_map[target][symbol] = merged
+            # Mutar el registro existente en vez de reconstruirlo con un
+            # spread {**a, **b}: cada upsert era una copia completa del dict.
+            existing = market_data_map[target].get(symbol)
+            if existing is None:
+                market_data_map[target][symbol] = {
+                    k: v for k, v in payload.items() if v is not None
+                }
+            else:
+                existing.update(
+                    (k, v) for k, v in payload.items() if v is not None
+                )
+
+        movers_map = {
+            "gainers": "gainers",
+            "losers": "losers",
+            "active": "active",
+            "viewed": "viewed",
+        }
+
+        # Reunir TODOS los símbolos candidatos (watchlist + tablas de
+        # movers) antes de pedir nada a yfinance: un solo prefetch batch y
+        # después el ensamblado es puro Python sin I/O.
+        watch_symbols = [item.get("symbol") for item in watchlist if item.get("symbol")]
+
+        # Materializar el top de cada tabla como lista de dicts planos una
+        # sola vez: iterrows() construye una Series por fila (con upcast de
+        # dtypes) y aquí se recorre cada tabla dos veces.
+        mover_heads: Dict[str, List[Dict[str, Any]]] = {}
+        for mover_type in movers_map:
+            table = self.data_fetcher.get_market_movers(mover_type)
+            if table is not None:
+                mover_heads[mover_type] = table.head(top_n).to_dict(orient="records")
+
+        all_symbols = list(watch_symbols)
+        for rows in mover_heads.values():
+            all_symbols.extend(
+                str(row.get("symbol", "")).upper()
+                for row in rows
+                if row.get("symbol")
+            )
+
+        info_map, weekly_map = self._prefetch_maps(all_symbols)
 
-        # Procesar watchlist con delay para evitar rate limiting
-        for idx, item in enumerate(watchlist):
+        for item in watchlist:
             symbol = item.get("symbol")
             if not symbol:
                 continue
 
-            # Delay progresivo para evitar rate limiting
-            if idx > 0:
-                time.sleep(0.3)
+            info = info_map.get(symbol.upper(), {})
+            weekly_perf = weekly_map.get(symbol.upper())
 
-            info = self.data_fetcher.get_stock_info(symbol)
-            weekly_perf = self.data_fetcher.get_weekly_performance(symbol)
-            
             payload = {
                 "symbol": symbol,
                 "name": item.get("name", info.get("name", symbol)),
@@ -297,32 +459,19 @@ class PortfolioCalculator:
                 elif payload["change_percent"] < 0:
                     upsert("losers", symbol, payload)
 
-        movers_map = {
-            "gainers": "gainers",
-            "losers": "losers",
-            "active": "active",
-            "viewed": "viewed",
-        }
-
-        # Procesar market movers con límite y delay
+        # Procesar market movers con límite por tabla (datos ya prefetcheados)
         for mover_type, bucket in movers_map.items():
-            table = self.data_fetcher.get_market_movers(mover_type)
-            if table is None:
+            rows = mover_heads.get(mover_type)
+            if not rows:
                 continue
-            
-            # Limitar a top_n elementos para reducir llamadas
-            for idx, (_, row) in enumerate(table.head(top_n).iterrows()):
+
+            for row in rows:
                 symbol = str(row.get("symbol", "")).upper()
                 if not symbol:
                     continue
-                
-                # Delay para evitar rate limiting en yfinance
-                if idx > 0:
-                    time.sleep(0.2)
-                
-                # Solo obtener info si no está ya cacheada
-                info = self.data_fetcher.get_stock_info(symbol)
-                weekly_perf = self.data_fetcher.get_weekly_performance(symbol)
+
+                info = info_map.get(symbol, {})
+                weekly_perf = weekly_map.get(symbol)
 
                 payload = {
                     "symbol": symbol,
@@ -344,12 +493,24 @@ class PortfolioCalculator:
                 upsert("viewed", symbol, payload)
 
         def sort_bucket(bucket: Dict[str, Dict[str, Any]], *, key: str, reverse: bool = True) -> List[Dict]:
+            # Ordenar vía np.argsort sobre la columna numérica extraída:
+            # las comparaciones ocurren en C en vez de invocar el lambda
+            # del key por elemento. 'stable' preserva el orden de empate
+            # igual que sorted().
             items = list(bucket.values())
-            return sorted(
-                items,
-                key=lambda entry: (entry.get(key) or 0),
-                reverse=reverse,
+            if len(items) < 2:
+                return items
+
+            values = np.fromiter(
+                ((entry.get(key) or 0.0) for entry in items),
+                dtype=np.float64,
+                count=len(items),
             )
+            # Para descendente se niega la columna en lugar de invertir el
+            # resultado: invertir un argsort estable rompería el orden de
+            # los empates respecto a sorted(reverse=True).
+            order = np.argsort(-values if reverse else values, kind="stable")
+            return [items[i] for i in order]
 
         viewed_list = sort_bucket(market_data_map["viewed"], key="volume", reverse=True)
         watchlist_list = sort_bucket(market_data_map["watchlist"], key="change_percent", reverse=True)
@@ -358,17 +519,16 @@ class PortfolioCalculator:
         active_list = sort_bucket(market_data_map["active"], key="volume", reverse=True)
 
         def merge_unique(buckets: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-            merged: List[Dict[str, Any]] = []
-            seen: set[str] = set()
-
+            # Dedupe y orden de prioridad en un solo dict: setdefault
+            # conserva la primera aparición y el orden de inserción,
+            # sin mantener un set paralelo ni hacer append condicional.
+            merged_map: Dict[str, Dict[str, Any]] = {}
             for bucket in buckets:
                 for entry in bucket:
                     symbol = entry.get("symbol")
-                    if not symbol or symbol in seen:
-                        continue
-                    merged.append(entry)
-                    seen.add(symbol)
-            return merged
+                    if symbol:
+                        merged_map.setdefault(symbol, entry)
+            return list(merged_map.values())
 
         priority_buckets = [
             gainers_list,
@@ -2,14 +2,26 @@
 Módulo principal del Portfolio Manager
 Orquesta todas las operaciones y genera los archivos de salida
 """
+import hashlib
 import json
 import logging
 import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from numbers import Real
 
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
 from config import (
     PORTFOLIO_CONFIG,
     WATCHLIST,
@@ -28,9 +40,14 @@ logger = logging.getLogger(__name__)
 
 class PortfolioManager:
     """Clase principal para gestionar el portafolio"""
-    
-    def __init__(self):
-        self.data_fetcher = DataFetcher()
+
+    # Antigüedad máxima del JSON local para usarlo sin consultar Supabase
+    LOCAL_DATA_TTL_SECONDS = 60
+
+    def __init__(self, data_fetcher: Optional[DataFetcher] = None):
+        # Se puede inyectar un DataFetcher compartido para que varias
+        # instancias (p.ej. una por thread) reutilicen los mismos caches.
+        self.data_fetcher = data_fetcher or DataFetcher()
         self.calculator = PortfolioCalculator(self.data_fetcher)
         self.chart_generator = ChartGenerator(CHART_CONFIG)
         self.portfolio_config = PORTFOLIO_CONFIG
@@ -39,6 +56,12 @@ class PortfolioManager:
     
         self._existing_portfolio_data: Optional[Dict] = None
         self._current_user_id: Optional[str] = None
+
+        # Ejecutor de un solo worker para guardar reportes en segundo
+        # plano: serializa saves consecutivos y deja que
+        # generate_full_report retorne sin esperar la red de Supabase.
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self._save_future = None
     
     def _load_existing_portfolio_data(self, user_id: Optional[str] = None) -> Optional[Dict]:
         """
@@ -50,6 +73,27 @@ class PortfolioManager:
         if self._existing_portfolio_data is not None and self._current_user_id == user_id:
             return self._existing_portfolio_data
 
+        # Si el JSON local es reciente, usarlo directamente y ahorrarse la
+        # ida a Supabase (que puede sumar segundos si está lento o caído).
+        # El archivo local es una ruta única compartida que cada guardado
+        # sobrescribe, así que solo sirve de atajo si el reporte guardado
+        # pertenece al mismo usuario; si no, seguir al load por usuario.
+        portfolio_path = OUTPUT_FILES.get("portfolio_data")
+        if portfolio_path:
+            local_path = Path(portfolio_path)
+            try:
+                if (
+                    local_path.is_file()
+                    and (time.time() - local_path.stat().st_mtime) < self.LOCAL_DATA_TTL_SECONDS
+                ):
+                    loaded = self._read_local_json(local_path)
+                    if isinstance(loaded, dict) and loaded.get("user_id") == user_id:
+                        self._existing_portfolio_data = loaded
+                        self._current_user_id = user_id
+                        return self._existing_portfolio_data
+            except Exception as exc:
+                logger.debug("No se pudo cargar portfolio_data local fresco: %s", exc)
+
         try:
             data = self.storage.load_portfolio_json(user_id)
             if data:
@@ -62,13 +106,20 @@ class PortfolioManager:
         portfolio_path = OUTPUT_FILES.get("portfolio_data")
         if portfolio_path and Path(portfolio_path).is_file():
             try:
-                with open(portfolio_path, "r", encoding="utf-8") as fp:
-                    self._existing_portfolio_data = json.load(fp)
-                    return self._existing_portfolio_data
+                self._existing_portfolio_data = self._read_local_json(Path(portfolio_path))
+                return self._existing_portfolio_data
             except Exception as exc:
                 logger.debug("No se pudo cargar portfolio_data local: %s", exc)
         return None
 
+    @staticmethod
+    def _read_local_json(path: Path) -> Any:
+        """Lee y parsea un JSON local; orjson si está disponible."""
+        payload = path.read_bytes()
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
     def generate_full_report(
         self, 
         period: str = "6mo",
@@ -88,7 +139,11 @@ class PortfolioManager:
             Diccionario con todos los datos del reporte
         """
         logger.info("Iniciando generación de reporte completo...")
-        
+
+        # Un único snapshot de reloj por reporte; todas las marcas de
+        # tiempo del dict final derivan de él.
+        report_timestamp = datetime.now().isoformat()
+
         # Determinar qué assets usar
         if assets_data is None:
             logger.info("Usando configuración hardcodeada de assets (PORTFOLIO_CONFIG)")
@@ -97,19 +152,36 @@ class PortfolioManager:
             logger.info(f"Usando assets dinámicos desde base de datos ({len(assets_data)} assets)")
             assets_to_process = assets_data
         
-        # 1. Calcular valor actual del portafolio
+        # Lanzar en paralelo las etapas de red independientes entre sí: el
+        # scrape de mercado y el rendimiento histórico no dependen del
+        # valor actual del portafolio, así que el tiempo total pasa de
+        # suma de etapas a máximo de etapas. Se usan threads (el stack
+        # yfinance/supabase es síncrono, así que asyncio no aplica sin
+        # reescribir los clientes).
+        market_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report")
+        market_future = market_executor.submit(
+            self.calculator.get_market_overview,
+            self.watchlist or [],
+            source_data=self._load_existing_portfolio_data(user_id),
+            use_persisted=False,
+        )
+        performance_future = market_executor.submit(
+            self.calculator.calculate_portfolio_performance,
+            assets_to_process,
+            period,
+        )
+
+        # 1. Calcular valor actual del portafolio (en el thread principal,
+        # solapado con las dos etapas anteriores)
         portfolio_summary = self.calculator.calculate_portfolio_value(
             assets_to_process
         )
-        
+
         logger.info(f"Valor del portafolio: ${portfolio_summary['total_value']:,.2f}")
-        
-        # 2. Calcular rendimiento histórico
-        performance_df = self.calculator.calculate_portfolio_performance(
-            assets_to_process,
-            period=period
-        )
-        
+
+        # 2. Recoger el rendimiento histórico calculado en paralelo
+        performance_df = performance_future.result()
+
         # 3. Calcular métricas adicionales
         metrics = self.calculator.calculate_portfolio_metrics(performance_df)
         
@@ -124,34 +196,39 @@ class PortfolioManager:
         )
         
         # Enriquecer allocation, ganadores y perdedores con weekly_performance si falta
-        weekly_map = {
-            asset["symbol"]: asset.get("weekly_performance")
-            for asset in portfolio_summary["assets"]
-            if isinstance(asset, dict)
-        }
+        # Solo entran al mapa los símbolos con sparkline real: así el loop
+        # de inyección resuelve todo con un único dict.get por entrada.
+        weekly_map: Dict[str, Any] = {}
+        for asset in portfolio_summary["assets"]:
+            weekly = asset.get("weekly_performance")
+            if weekly:
+                weekly_map[asset["symbol"]] = weekly
 
         def _inject_weekly(data_list: List[Dict]) -> None:
+            # allocation/gainers/losers salen del calculador y son listas
+            # homogéneas de dicts; sin chequeo de tipo por entrada.
             for entry in data_list:
-                if not isinstance(entry, dict):
-                    continue
                 weekly = entry.get("weekly_performance")
-                if isinstance(weekly, list) and len(weekly) >= 2:
+                if weekly.__class__ is list and len(weekly) >= 2:
                     continue
-                symbol = entry.get("symbol")
-                if symbol and weekly_map.get(symbol):
-                    entry["weekly_performance"] = weekly_map[symbol]
+                replacement = weekly_map.get(entry.get("symbol"))
+                if replacement:
+                    entry["weekly_performance"] = replacement
 
         _inject_weekly(allocation)
         _inject_weekly(gainers)
         _inject_weekly(losers)
 
-        # 6. Obtener datos de mercado (Watchlist)
-        market_overview_sections = self.calculator.get_market_overview(
-            self.watchlist or [],
-            source_data=self._load_existing_portfolio_data(user_id),
-            use_persisted=False,
-        )
-        
+        # 6. Recoger los datos de mercado (lanzados en paralelo arriba)
+        try:
+            market_overview_sections = market_future.result()
+        except Exception as exc:
+            logger.warning("No se pudo obtener market overview: %s", exc)
+            market_overview_sections = {}
+        finally:
+            market_executor.shutdown(wait=False)
+
+
         all_list = market_overview_sections.get("all", [])
         gainers_list = market_overview_sections.get("gainers", [])
         losers_list = market_overview_sections.get("losers", [])
@@ -168,7 +245,7 @@ class PortfolioManager:
         
         # 8. Compilar reporte completo
         report = {
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": report_timestamp,
             "period": period,
             "user_id": user_id,  # Incluir user_id en el reporte
             "summary": {
@@ -194,7 +271,11 @@ class PortfolioManager:
         
         # 9. Guardar datos en JSON/Supabase (con user_id para storage dinámico)
         sanitized_report = self._sanitize_for_json(report)
-        self._save_portfolio_data(sanitized_report, user_id)
+        # Guardado en segundo plano: el reporte ya está finalizado y los
+        # callers consumen el dict en memoria, no el archivo.
+        self._save_future = self._save_executor.submit(
+            self._save_portfolio_data, sanitized_report, user_id
+        )
         
         logger.info("Reporte completo generado exitosamente")
         
@@ -219,100 +300,281 @@ class PortfolioManager:
             Diccionario con rutas locales y remotas de gráficos
         """
         logger.info("Generando gráficos...")
-        
+
+        # Resolver rutas de salida una sola vez; evita reconstruir Path y
+        # repetir lookups de OUTPUT_FILES en el resto de la función.
+        portfolio_chart_html = Path(OUTPUT_FILES["portfolio_chart_html"])
+        portfolio_chart_png = Path(OUTPUT_FILES["portfolio_chart_png"])
+        assets_charts_dir = Path(OUTPUT_FILES["assets_charts_dir"])
+        allocation_dir = assets_charts_dir.parent
+        if user_id:
+            # Salidas por usuario: con el pool de process_all_users dos
+            # threads pueden renderizar el mismo símbolo a la vez, y
+            # write_html/write_image no son atómicos — sobre una ruta
+            # compartida el flush podría subir un archivo a medio escribir.
+            from config import SupabaseConfig
+
+            user_dir = f"user_{SupabaseConfig.sanitize_filename_for_storage(user_id)}"
+            portfolio_chart_html = portfolio_chart_html.parent / user_dir / portfolio_chart_html.name
+            portfolio_chart_png = portfolio_chart_png.parent / user_dir / portfolio_chart_png.name
+            assets_charts_dir = assets_charts_dir / user_dir
+            allocation_dir = allocation_dir / user_dir
+        portfolio_chart_html.parent.mkdir(parents=True, exist_ok=True)
+        assets_charts_dir.mkdir(parents=True, exist_ok=True)
+        allocation_dir.mkdir(parents=True, exist_ok=True)
+        allocation_chart_html = allocation_dir / "allocation_chart.html"
+        allocation_chart_png = allocation_dir / "allocation_chart.png"
+
         # Gráfico principal del portafolio
         html_path, png_bytes = self.chart_generator.create_portfolio_performance_chart(
             performance_df,
-            OUTPUT_FILES["portfolio_chart_html"],
-            OUTPUT_FILES["portfolio_chart_png"]
+            portfolio_chart_html,
+            portfolio_chart_png
         )
 
         charts_map: Dict[str, str] = {
-            "portfolio_performance": str(OUTPUT_FILES["portfolio_chart_html"]),
+            "portfolio_performance": str(portfolio_chart_html),
         }
-        
-        # Upload HTML chart
-        self._upload_chart_if_enabled("portfolio_performance", OUTPUT_FILES["portfolio_chart_html"], charts_map, user_id)
+
+        # Acumular los uploads HTML y subirlos en lote al final: evita una
+        # ida y vuelta HTTP por archivo contra Supabase.
+        pending_uploads: List[Tuple[str, Path]] = [
+            ("portfolio_performance", portfolio_chart_html),
+        ]
         # Upload PNG bytes directly to Supabase
         if png_bytes:
             self._upload_png_bytes_to_supabase("portfolio_performance", png_bytes, charts_map, user_id)
         else:
             logger.warning("No PNG bytes generated for portfolio performance chart")
 
-        # Gráficos individuales de cada activo
-        assets_charts_dir = OUTPUT_FILES["assets_charts_dir"]
-        
-        # Importar función de sanitización para usar en claves del charts_map
-        from config import SupabaseConfig
-        
-        for asset in assets_data:
-            symbol = asset["symbol"]
-
-            intraday_attempts = [
-                ("60d", "15m"),
-                ("30d", "15m"),
-                ("30d", "30m"),
-                ("30d", "1h"),
-            ]
-
-            intraday_data = None
-            intraday_interval = None
-
-            for period, interval in intraday_attempts:
-                intraday_data = self.data_fetcher.get_stock_data(symbol, period=period, interval=interval)
-                if intraday_data is not None and not intraday_data.empty:
-                    intraday_interval = interval
-                    break
-
-            daily_data = self.data_fetcher.get_stock_data(symbol, period="6mo", interval="1d")
-
-            if (
-                (intraday_data is None or intraday_data.empty)
-                and (daily_data is None or daily_data.empty)
-            ):
-                logger.warning("No se pudieron obtener datos históricos para %s", symbol)
-                continue
+        # Descargar los datos de todos los activos en paralelo (I/O puro
+        # de yfinance) y renderizar cada símbolo apenas su descarga
+        # termina, con as_completed: el render de los primeros símbolos se
+        # solapa con las descargas restantes en vez de esperar a todas.
+        # El render y los uploads se quedan en el thread principal: kaleido
+        # exporta vía un único subproceso y ni el generador de gráficos ni
+        # el cliente de Supabase garantizan thread-safety.
+        symbols = [asset["symbol"] for asset in assets_data]
 
-            output_html = assets_charts_dir / f"{symbol}_chart.html"
-            output_png = assets_charts_dir / f"{symbol}_chart.png"
+        # Hashes de los datos de la corrida anterior: si el OHLC de un
+        # símbolo no cambió (fin de semana, after-hours) y sus archivos
+        # siguen en disco, el render con kaleido se omite por completo.
+        chart_cache_path = assets_charts_dir / ".chart_cache.json"
+        previous_hashes: Dict[str, str] = {}
+        try:
+            with open(chart_cache_path, "r", encoding="utf-8") as fp:
+                loaded = json.load(fp)
+                if isinstance(loaded, dict):
+                    previous_hashes = loaded
+        except Exception:
+            pass
+        current_hashes: Dict[str, str] = dict(previous_hashes)
+        previous_charts: Dict[str, str] = (self._existing_portfolio_data or {}).get("charts", {}) or {}
 
-            html_path, png_bytes = self.chart_generator.create_asset_chart(
-                symbol,
-                intraday_data,
-                output_html,
-                output_png,
-                daily_data=daily_data,
-                intraday_interval=intraday_interval,
-            )
+        # Precargar en dos descargas batch los históricos del caso común
+        # (intradía 60d/15m y diario 6mo/1d): get_stock_data los sirve
+        # después desde el cache en memoria, así que los workers solo
+        # pagan red para los símbolos que necesiten los fallbacks de
+        # intervalo (30m/1h).
+        if symbols:
+            self.data_fetcher.prime_history_cache(symbols, period="60d", interval="15m")
+            self.data_fetcher.prime_history_cache(symbols, period="6mo", interval="1d")
 
-            # Usar símbolo sanitizado para las claves en charts_map (para consistencia con Supabase)
-            sanitized_symbol = SupabaseConfig.sanitize_filename_for_storage(symbol)
-            # Upload HTML chart
-            self._upload_chart_if_enabled(f"asset_{sanitized_symbol}_html", output_html, charts_map, user_id)
-            # Upload PNG bytes directly to Supabase
-            if png_bytes:
-                self._upload_png_bytes_to_supabase(f"asset_{sanitized_symbol}", png_bytes, charts_map, user_id)
-            else:
-                logger.warning(f"No PNG bytes generated for asset {symbol}")
+        fetch_executor = ThreadPoolExecutor(max_workers=min(8, max(len(symbols), 1)))
+        try:
+            futures = {
+                fetch_executor.submit(self._fetch_asset_chart_data, symbol): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    intraday_data, intraday_interval, daily_data = future.result()
+                except Exception:
+                    logger.exception("Error descargando datos de gráfico para %s", symbol)
+                    continue
 
+                self._render_asset_chart(
+                    symbol,
+                    intraday_data,
+                    intraday_interval,
+                    daily_data,
+                    assets_charts_dir,
+                    charts_map,
+                    pending_uploads,
+                    user_id,
+                    previous_hashes=previous_hashes,
+                    current_hashes=current_hashes,
+                    previous_charts=previous_charts,
+                )
+        finally:
+            fetch_executor.shutdown(wait=True)
+
+        # Persistir los hashes para la próxima corrida (archivo pequeño)
+        try:
+            self._write_local_json(
+                chart_cache_path,
+                json.dumps(current_hashes, ensure_ascii=False).encode("utf-8"),
+            )
+        except Exception as exc:
+            logger.debug("No se pudo guardar el cache de hashes de gráficos: %s", exc)
         # Gráfico de distribución (usa allocation ya calculado en generate_full_report)
         allocation_html, allocation_png_bytes = self.chart_generator.create_allocation_pie_chart(
             allocation,  # Usar el allocation pasado como parámetro
-            Path(OUTPUT_FILES["assets_charts_dir"]).parent / "allocation_chart.html",
-            Path(OUTPUT_FILES["assets_charts_dir"]).parent / "allocation_chart.png"
+            allocation_chart_html,
+            allocation_chart_png
         )
-        
-        # Upload HTML chart
-        self._upload_chart_if_enabled("allocation_chart", Path(OUTPUT_FILES["assets_charts_dir"]).parent / "allocation_chart.html", charts_map, user_id)
+
+        pending_uploads.append(("allocation_chart", allocation_chart_html))
         # Upload PNG bytes directly to Supabase
         if allocation_png_bytes:
             self._upload_png_bytes_to_supabase("allocation_chart", allocation_png_bytes, charts_map, user_id)
         else:
             logger.warning("No PNG bytes generated for allocation chart")
-        
+
+        # Subida batch de todos los HTML acumulados (una sola pasada)
+        self._flush_chart_uploads(pending_uploads, charts_map, user_id)
+
         logger.info("Gráficos generados exitosamente")
         return charts_map
 
+    def _fetch_asset_chart_data(self, symbol: str) -> Tuple[Any, Optional[str], Any]:
+        """
+        Descarga los datos intradía y diarios para el gráfico de un activo.
+
+        Args:
+            symbol: Símbolo del activo
+
+        Returns:
+            Tupla (intraday_data, intraday_interval, daily_data); los
+            DataFrames pueden ser None si no hubo datos disponibles.
+        """
+        intraday_attempts = [
+            ("60d", "15m"),
+            ("30d", "15m"),
+            ("30d", "30m"),
+            ("30d", "1h"),
+        ]
+
+        intraday_data = None
+        intraday_interval = None
+
+        for period, interval in intraday_attempts:
+            intraday_data = self.data_fetcher.get_stock_data(symbol, period=period, interval=interval)
+            if intraday_data is not None and not intraday_data.empty:
+                intraday_interval = interval
+                break
+
+        daily_data = self.data_fetcher.get_stock_data(symbol, period="6mo", interval="1d")
+
+        return intraday_data, intraday_interval, daily_data
+
+    def _render_asset_chart(
+        self,
+        symbol: str,
+        intraday_data,
+        intraday_interval: Optional[str],
+        daily_data,
+        assets_charts_dir: Path,
+        charts_map: Dict[str, str],
+        pending_uploads: List[Tuple[str, Path]],
+        user_id: Optional[str] = None,
+        previous_hashes: Optional[Dict[str, str]] = None,
+        current_hashes: Optional[Dict[str, str]] = None,
+        previous_charts: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Renderiza los gráficos de un activo con datos ya descargados.
+
+        Los PNG se suben de inmediato (los bytes ya están en memoria); los
+        HTML solo se encolan en ``pending_uploads`` para la subida batch.
+        Si el hash de los datos coincide con el de la corrida anterior y
+        los archivos siguen en disco, se reutiliza el renderizado previo.
+
+        Args:
+            symbol: Símbolo del activo
+            intraday_data: DataFrame intradía (puede ser None)
+            intraday_interval: Intervalo usado para los datos intradía
+            daily_data: DataFrame diario (puede ser None)
+            assets_charts_dir: Directorio de salida de los gráficos
+            charts_map: Diccionario de rutas de gráficos a actualizar
+            pending_uploads: Lista de (clave, ruta) pendientes de subida batch
+            user_id: UUID del usuario (para almacenamiento dinámico)
+        """
+        # Importar función de sanitización para usar en claves del charts_map
+        from config import SupabaseConfig
+
+        if (
+            (intraday_data is None or intraday_data.empty)
+            and (daily_data is None or daily_data.empty)
+        ):
+            logger.warning("No se pudieron obtener datos históricos para %s", symbol)
+            return
+
+        output_html = assets_charts_dir / f"{symbol}_chart.html"
+        output_png = assets_charts_dir / f"{symbol}_chart.png"
+
+        sanitized_symbol = SupabaseConfig.sanitize_filename_for_storage(symbol)
+
+        data_hash = self._chart_data_hash(intraday_data, daily_data)
+        if current_hashes is not None:
+            current_hashes[symbol] = data_hash
+        if (
+            previous_hashes is not None
+            and previous_hashes.get(symbol) == data_hash
+            and output_html.exists()
+            and output_png.exists()
+        ):
+            # Mismos datos que la corrida anterior: reutilizar archivos y
+            # rutas remotas previas sin pagar el render de kaleido.
+            logger.info("Datos sin cambios para %s; se reutiliza el gráfico anterior", symbol)
+            prefix = f"asset_{sanitized_symbol}"
+            if previous_charts:
+                # Claves exactas, no startswith: el prefijo de un ticker de
+                # una letra (p. ej. "A") también matchearía asset_AAPL_*.
+                for key in (
+                    f"{prefix}_html_remote",
+                    f"{prefix}_html_url",
+                    f"{prefix}_remote",
+                    f"{prefix}_url",
+                ):
+                    if key in previous_charts:
+                        charts_map[key] = previous_charts[key]
+            return
+
+        html_path, png_bytes = self.chart_generator.create_asset_chart(
+            symbol,
+            intraday_data,
+            output_html,
+            output_png,
+            daily_data=daily_data,
+            intraday_interval=intraday_interval,
+        )
+
+        # El HTML se sube en el batch final
+        pending_uploads.append((f"asset_{sanitized_symbol}_html", output_html))
+        # Upload PNG bytes directly to Supabase
+        if png_bytes:
+            self._upload_png_bytes_to_supabase(f"asset_{sanitized_symbol}", png_bytes, charts_map, user_id)
+        else:
+            logger.warning(f"No PNG bytes generated for asset {symbol}")
+
+    @staticmethod
+    def _chart_data_hash(intraday_data, daily_data) -> str:
+        """
+        Hash rápido y estable del contenido OHLC que alimenta un gráfico.
+
+        Usa hash_pandas_object (una pasada en C por DataFrame) reducido a
+        8 bytes; suficiente para detectar cambios entre corridas.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        for df in (intraday_data, daily_data):
+            if df is not None and not df.empty:
+                digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+            else:
+                digest.update(b"\x00")
+        return digest.hexdigest()
+
     def _upload_png_bytes_to_supabase(
         self, 
         key: str, 
@@ -361,50 +623,88 @@ class PortfolioManager:
         except Exception as exc:
             logger.error(f"No se pudo subir PNG bytes para '{key}' a Supabase: {exc}")
 
-    def _upload_chart_if_enabled(
-        self, 
-        key: str, 
-        path: Path, 
+    def _flush_chart_uploads(
+        self,
+        pending_uploads: List[Tuple[str, Path]],
         charts_map: Dict[str, str],
         user_id: Optional[str] = None
     ) -> None:
-        # Verificar que el archivo existe y no está vacío
-        if not path.exists():
-            logger.warning("Archivo de gráfico no existe, omitiendo subida: %s", path)
-            return
-        
-        # Si es PNG, verificar que fue generado recientemente (menos de 5 minutos)
-        # para evitar subir archivos obsoletos cuando la exportación falla
-        if path.suffix.lower() == '.png':
-            from datetime import datetime, timedelta
-            file_modified = datetime.fromtimestamp(path.stat().st_mtime)
-            now = datetime.now()
-            
-            # Si el archivo tiene más de 5 minutos, es obsoleto (no se regeneró)
-            if now - file_modified > timedelta(minutes=5):
-                logger.warning(
-                    "Archivo PNG obsoleto (modificado %s), omitiendo subida: %s",
-                    file_modified.strftime("%Y-%m-%d %H:%M:%S"),
-                    path
-                )
-                return
-        
-        try:
-            remote_info = self.storage.upload_chart_asset(path, user_id)
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.warning("No se pudo subir gráfico '%s' a Supabase: %s", key, exc)
+        """
+        Valida y sube en una sola pasada los gráficos acumulados.
+
+        Args:
+            pending_uploads: Lista de (clave, ruta local) a subir
+            charts_map: Diccionario donde registrar rutas/URLs remotas
+            user_id: UUID del usuario (para almacenamiento dinámico)
+        """
+        valid: List[Tuple[str, Path]] = []
+        for key, path in pending_uploads:
+            # Verificar que el archivo existe y no está vacío
+            if not path.exists():
+                logger.warning("Archivo de gráfico no existe, omitiendo subida: %s", path)
+                continue
+
+            # Si es PNG, verificar que fue generado recientemente (menos de 5 minutos)
+            # para evitar subir archivos obsoletos cuando la exportación falla.
+            # Comparación directa de epochs: sin construir datetimes por gráfico.
+            if path.suffix.lower() == '.png':
+                age_seconds = time.time() - path.stat().st_mtime
+                if age_seconds > 300:
+                    logger.warning(
+                        "Archivo PNG obsoleto (%.0f s de antigüedad), omitiendo subida: %s",
+                        age_seconds,
+                        path
+                    )
+                    continue
+
+            valid.append((key, path))
+
+        if not valid:
             return
 
-        if remote_info:
-            charts_map[f"{key}_remote"] = remote_info.get("path", "")
-            if remote_info.get("public_url"):
-                charts_map[f"{key}_url"] = remote_info["public_url"]
+        results = self.storage.upload_chart_assets([path for _, path in valid], user_id)
+
+        for key, path in valid:
+            remote_info = results.get(path)
+            if remote_info:
+                charts_map[f"{key}_remote"] = remote_info.get("path", "")
+                if remote_info.get("public_url"):
+                    charts_map[f"{key}_url"] = remote_info["public_url"]
     
     def _sanitize_for_json(self, value: Any) -> Any:
+        # Camino rápido para hojas ya JSON-limpias (la gran mayoría del
+        # reporte): un chequeo de tipo exacto evita la cascada de
+        # isinstance con recorrido de MRO por cada escalar.
+        value_type = type(value)
+        if value is None or value_type is str or value_type is int or value_type is bool:
+            return value
+        if value_type is float:
+            return value if math.isfinite(value) else None
+
+        # Copy-on-write: los contenedores solo se copian si algún hijo
+        # cambió; un reporte ya limpio se devuelve tal cual sin duplicar
+        # cada dict/list anidado. float(x)/int(x) sobre tipos nativos
+        # exactos devuelven el mismo objeto, así que la comparación por
+        # identidad detecta coerciones reales (numpy, NaN) sin falsos
+        # positivos.
         if isinstance(value, dict):
-            return {key: self._sanitize_for_json(val) for key, val in value.items()}
+            sanitized_dict = None
+            for key, val in value.items():
+                new_val = self._sanitize_for_json(val)
+                if new_val is not val:
+                    if sanitized_dict is None:
+                        sanitized_dict = dict(value)
+                    sanitized_dict[key] = new_val
+            return sanitized_dict if sanitized_dict is not None else value
         if isinstance(value, list):
-            return [self._sanitize_for_json(item) for item in value]
+            sanitized_list = None
+            for idx, item in enumerate(value):
+                new_item = self._sanitize_for_json(item)
+                if new_item is not item:
+                    if sanitized_list is None:
+                        sanitized_list = list(value)
+                    sanitized_list[idx] = new_item
+            return sanitized_list if sanitized_list is not None else value
         if isinstance(value, bool):
             return value
         if isinstance(value, Real):
@@ -416,6 +716,16 @@ class PortfolioManager:
             return numeric
         return value
 
+    def wait_for_saves(self, timeout: Optional[float] = None) -> None:
+        """
+        Bloquea hasta que termine el último guardado en segundo plano.
+
+        Para callers que necesitan durabilidad (CLI antes de salir,
+        tests) en lugar de solo el dict en memoria.
+        """
+        if self._save_future is not None:
+            self._save_future.result(timeout=timeout)
+
     def _save_portfolio_data(self, report: Dict[str, Any], user_id: Optional[str] = None) -> None:
         """
         Guarda los datos del portafolio en JSON
@@ -424,21 +734,79 @@ class PortfolioManager:
             report: Diccionario con el reporte completo
             user_id: UUID del usuario (para estructura dinámica en Supabase)
         """
+        # Serializar UNA sola vez; los mismos bytes sirven para el upsert
+        # en Supabase y para la copia local, en vez de recorrer el
+        # reporte completo dos veces.
+        payload = self._serialize_report(report)
+
+        saved = False
         try:
-            self.storage.save_portfolio_json(report, user_id)
+            self.storage.save_portfolio_json_bytes(payload, user_id)
             logger.info("Datos guardados en Supabase")
-            self._existing_portfolio_data = report
-            self._current_user_id = user_id
+            saved = True
         except Exception as exc:
             logger.warning("No se pudo guardar en Supabase: %s", exc)
+
+        # El JSON local se escribe siempre, no solo como fallback: los
+        # endpoints /report, /summary y /market lo sirven directamente y
+        # sin esta copia quedarían congelados en el reporte anterior.
+        try:
+            local_path = Path(OUTPUT_FILES["portfolio_data"])
+            self._write_local_json(local_path, payload)
+            logger.info(f"Datos guardados localmente en: {local_path}")
+            saved = True
+        except Exception as local_exc:
+            logger.error("Error guardando datos localmente: %s", local_exc)
+
+        if saved:
+            self._existing_portfolio_data = report
+            self._current_user_id = user_id
+
+    @staticmethod
+    def _serialize_report(report: Dict[str, Any]) -> bytes:
+        """
+        Serializa el reporte a bytes UTF-8 una sola vez.
+
+        Si orjson está disponible se usa su serializador en C; si no,
+        json estándar con el mismo formato indentado.
+        """
+        if orjson is not None:
+            return orjson.dumps(
+                report,
+                default=str,
+                option=(
+                    orjson.OPT_INDENT_2
+                    | orjson.OPT_SERIALIZE_NUMPY
+                    | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_APPEND_NEWLINE
+                ),
+            )
+        return json.dumps(report, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+
+    @staticmethod
+    def _write_local_json(path: Path, payload: bytes) -> None:
+        """
+        Escribe el JSON ya serializado de forma atómica.
+
+        Se escribe a un archivo temporal y luego ``os.replace`` para que un
+        lector concurrente nunca vea un JSON a medio escribir.
+        """
+        # Nombre temporal único: con el pool por usuario varios managers
+        # guardan a la vez y un .tmp fijo dejaría que dos escrituras se
+        # intercalen y publiquen un JSON corrupto.
+        fd, tmp_name = tempfile.mkstemp(
+            dir=path.parent, prefix=f"{path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(payload)
+            os.replace(tmp_name, path)
+        except BaseException:
             try:
-                with open(OUTPUT_FILES["portfolio_data"], 'w', encoding='utf-8') as f:
-                    json.dump(report, f, indent=2, ensure_ascii=False, default=str)
-                logger.info(f"Datos guardados localmente en: {OUTPUT_FILES['portfolio_data']}")
-                self._existing_portfolio_data = report
-                self._current_user_id = user_id
-            except Exception as local_exc:
-                logger.error("Error guardando datos localmente: %s", local_exc)
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
     
     def get_portfolio_summary(self) -> Dict[str, Any]:
         """
@@ -459,10 +827,15 @@ class PortfolioManager:
             "timestamp": portfolio_summary["timestamp"],
         }
     
-    def get_market_data(self) -> Dict[str, Any]:
+    def get_market_data(self, now: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Obtiene datos del mercado (watchlist)
-        
+
+        Args:
+            now: Marca de tiempo a usar; si se omite se toma el reloj
+                actual. Permite que un caller que hace varias llamadas
+                comparta un único snapshot de reloj.
+
         Returns:
             Diccionario con datos de mercado
         """
@@ -470,7 +843,7 @@ class PortfolioManager:
             self.watchlist,
             use_persisted=False,
         )
-        overview["timestamp"] = datetime.now().isoformat()
+        overview["timestamp"] = (now or datetime.now()).isoformat()
         return overview
     
     def update_portfolio_config(self, new_config: Dict) -> None:
@@ -526,6 +899,9 @@ def main():
     for asset in report['assets']:
         print(f"{asset['symbol']:6} | ${asset['current_price']:8.2f} | {asset['change_percent']:+6.2f}% | {asset['units']} units | ${asset['position_value']:,.2f}")
     
+    # Esperar el guardado en segundo plano antes de anunciarlo
+    manager.wait_for_saves()
+
     print("\n" + "="*60)
     print("Reporte completo guardado en:", OUTPUT_FILES["portfolio_data"])
     print("="*60 + "\n")
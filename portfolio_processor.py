@@ -5,6 +5,9 @@ Coordina la obtención de datos desde Supabase y la generación de reportes indi
 from __future__ import annotations
 
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
@@ -23,7 +26,33 @@ class PortfolioProcessor:
         """Inicializa el procesador con cliente de DB y portfolio manager."""
         self.db_client = SupabaseDBClient()
         self.portfolio_manager = PortfolioManager()
-        
+        self._thread_local = threading.local()
+
+    def _get_portfolio_manager(self) -> PortfolioManager:
+        """
+        Devuelve un PortfolioManager por thread.
+
+        generate_full_report mantiene estado por usuario, así que cada
+        thread del pool necesita su propia instancia; todas comparten el
+        mismo DataFetcher (y por lo tanto los caches precargados).
+        """
+        if threading.current_thread() is threading.main_thread():
+            return self.portfolio_manager
+
+        manager = getattr(self._thread_local, "manager", None)
+        if manager is None:
+            manager = PortfolioManager(data_fetcher=self.portfolio_manager.data_fetcher)
+            self._thread_local.manager = manager
+        return manager
+
+    @staticmethod
+    def _worker_pool_size() -> int:
+        """Tamaño del pool de usuarios, configurable por entorno."""
+        try:
+            return max(1, int(os.getenv("PORTFOLIO_WORKER_POOL_SIZE", "4")))
+        except ValueError:
+            return 4
+
     def _transform_assets_format(self, db_assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Transforma los assets desde el formato de BD al formato esperado por PortfolioManager.
@@ -142,19 +171,23 @@ class PortfolioProcessor:
         return transformed
     
     def process_user(
-        self, 
-        user_id: str, 
+        self,
+        user_id: str,
         period: str = "6mo",
-        skip_if_no_assets: bool = True
+        skip_if_no_assets: bool = True,
+        user_data: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Procesa el portfolio de un usuario específico.
-        
+
         Args:
             user_id: UUID del usuario
             period: Periodo de análisis histórico
             skip_if_no_assets: Si True, omite usuarios sin assets
-        
+            user_data: Datos completos del usuario ya cargados (formato de
+                get_user_full_data). Si se proporcionan, se evitan las
+                queries individuales a Supabase.
+
         Returns:
             Diccionario con resultado del procesamiento:
             {
@@ -175,9 +208,10 @@ class PortfolioProcessor:
         
         try:
             logger.info(f"=== Procesando usuario {user_id} ===")
-            
-            # Obtener datos completos del usuario
-            user_data = self.db_client.get_user_full_data(user_id)
+
+            # Obtener datos completos del usuario (si no vienen precargados)
+            if user_data is None:
+                user_data = self.db_client.get_user_full_data(user_id)
             
             user_info = user_data.get("user", {})
             portfolios = user_data.get("portfolios", [])
@@ -223,7 +257,7 @@ class PortfolioProcessor:
             logger.info(f"Generando reporte con {len(transformed_assets)} assets únicos...")
             
             # Generar reporte completo usando PortfolioManager
-            report = self.portfolio_manager.generate_full_report(
+            report = self._get_portfolio_manager().generate_full_report(
                 period=period,
                 assets_data=transformed_assets,
                 user_id=user_id
@@ -250,17 +284,20 @@ class PortfolioProcessor:
             return result
     
     def process_all_users(
-        self, 
+        self,
         period: str = "6mo",
-        skip_if_no_assets: bool = True
+        skip_if_no_assets: bool = True,
+        dry_run: bool = False
     ) -> Dict[str, Any]:
         """
         Procesa todos los usuarios de la base de datos.
-        
+
         Args:
             period: Periodo de análisis histórico
             skip_if_no_assets: Si True, omite usuarios sin assets
-        
+            dry_run: Si True, solo lista usuarios y tickers planificados
+                (sin descargas de yfinance ni generación de gráficos)
+
         Returns:
             Resumen de la ejecución:
             {
@@ -300,26 +337,112 @@ class PortfolioProcessor:
                 return summary
             
             logger.info(f"Total de usuarios a procesar: {len(users)}\n")
-            
-            # Procesar cada usuario
+
+            # Fetch masivo: portfolios + assets de todos los usuarios en una
+            # sola query, en lugar de 2 queries por usuario.
+            user_ids = [user["user_id"] for user in users if user.get("user_id")]
+            portfolios_by_user: Dict[str, List[Dict[str, Any]]] = {}
+            try:
+                portfolios_by_user = self.db_client.get_portfolios_with_assets_bulk(user_ids)
+            except Exception as e:
+                logger.warning(
+                    f"Fetch masivo de portfolios falló ({e}); "
+                    f"se usarán queries individuales."
+                )
+
+            # Precargar el histórico de la unión de tickers en una sola
+            # descarga de yfinance (en vez de una descarga por ticker por usuario)
+            all_symbols = {
+                str(asset.get("asset_symbol", "")).strip().upper()
+                for portfolios in portfolios_by_user.values()
+                for portfolio in portfolios
+                for asset in portfolio.get("assets", [])
+                if asset.get("asset_symbol")
+            }
+            if dry_run:
+                # Plan de trabajo sin tocar yfinance: valida configuración y
+                # conectividad con Supabase en segundos, sin gastar cuota.
+                planned_symbols = sorted(all_symbols)
+                logger.info(
+                    "DRY RUN: %d usuarios, %d tickers únicos: %s",
+                    len(users), len(planned_symbols), ", ".join(planned_symbols) or "(ninguno)"
+                )
+                summary["planned_symbols"] = planned_symbols
+                for user in users:
+                    user_id = user.get("user_id")
+                    if not user_id:
+                        continue
+                    portfolios = portfolios_by_user.get(user_id, [])
+                    summary["details"].append({
+                        "user_id": user_id,
+                        "status": "planned",
+                        "portfolios_processed": len(portfolios),
+                        "assets_processed": sum(
+                            len(p.get("assets", [])) for p in portfolios
+                        ),
+                    })
+                summary["skipped"] = summary["total_users"]
+                summary["completed_at"] = datetime.now().isoformat()
+                return summary
+
+            if all_symbols:
+                self.portfolio_manager.data_fetcher.prime_history_cache(
+                    sorted(all_symbols), period=period
+                )
+
+            # Preparar trabajos por usuario
+            jobs: List[Dict[str, Any]] = []
             for idx, user in enumerate(users, 1):
                 user_id = user.get("user_id")
-                
+
                 if not user_id:
                     logger.warning(f"Usuario #{idx} sin user_id. Omitiendo...")
                     summary["skipped"] += 1
                     continue
-                
-                logger.info(f"\n[{idx}/{len(users)}] Procesando usuario {user_id}...")
-                
-                result = self.process_user(
-                    user_id=user_id,
-                    period=period,
-                    skip_if_no_assets=skip_if_no_assets
-                )
-                
+
+                user_data = None
+                if user_id in portfolios_by_user:
+                    user_data = {
+                        "user": user,
+                        "portfolios": portfolios_by_user[user_id],
+                    }
+                jobs.append({"user_id": user_id, "user_data": user_data})
+
+            # Procesar usuarios en paralelo con un pool acotado: el trabajo
+            # por usuario está dominado por I/O de red (yfinance/Supabase).
+            pool_size = min(self._worker_pool_size(), max(len(jobs), 1))
+            results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+
+            if pool_size <= 1 or len(jobs) <= 1:
+                for idx, job in enumerate(jobs):
+                    logger.info(f"\n[{idx + 1}/{len(jobs)}] Procesando usuario {job['user_id']}...")
+                    results[idx] = self.process_user(
+                        user_id=job["user_id"],
+                        period=period,
+                        skip_if_no_assets=skip_if_no_assets,
+                        user_data=job["user_data"]
+                    )
+            else:
+                logger.info(f"Procesando {len(jobs)} usuarios con {pool_size} workers...")
+                with ThreadPoolExecutor(max_workers=pool_size) as executor:
+                    future_to_idx = {
+                        executor.submit(
+                            self.process_user,
+                            user_id=job["user_id"],
+                            period=period,
+                            skip_if_no_assets=skip_if_no_assets,
+                            user_data=job["user_data"]
+                        ): idx
+                        for idx, job in enumerate(jobs)
+                    }
+                    for future in as_completed(future_to_idx):
+                        results[future_to_idx[future]] = future.result()
+
+            for result in results:
+                if result is None:
+                    continue
                 summary["details"].append(result)
-                
+
                 # Actualizar contadores
                 if result["status"] == "success":
                     summary["successful"] += 1
@@ -327,7 +450,8 @@ class PortfolioProcessor:
                     summary["errors"] += 1
                 elif result["status"] == "skipped":
                     summary["skipped"] += 1
-            
+
+
             # Finalizar
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
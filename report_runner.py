@@ -0,0 +1,447 @@
+"""
+Implementación canónica de la generación de reportes de Portfolio.
+
+Los scripts ``generate_report.py`` y ``generate_report_legacy.py`` son
+shims delgados sobre este módulo: una sola implementación de ``main``,
+``run_worker`` y el parseo de argumentos en lugar de copias divergentes
+por entrypoint.
+"""
+import functools
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import argparse
+from datetime import datetime, time as dtime
+from itertools import islice
+from zoneinfo import ZoneInfo
+from pathlib import Path
+from config import get_logger
+
+# PortfolioProcessor (y con él yfinance, pandas, plotly...) se importa
+# de forma diferida dentro de main(): `--help` y el arranque del worker
+# no pagan cientos de ms de imports pesados.
+
+logger = get_logger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_processor():
+    """Singleton del procesador: reutiliza sesiones HTTP, clientes de
+    Supabase y caches de yfinance entre iteraciones del worker."""
+    from portfolio_processor import PortfolioProcessor
+
+    return PortfolioProcessor()
+
+# Zona horaria de Nueva York (stdlib, cacheada por intérprete)
+NY_TZ = ZoneInfo('America/New_York')
+
+# Horario de mercado NYSE como constantes de módulo: evita construir dos
+# datetimes por chequeo en el bucle del worker
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+
+
+# Regex precompiladas para validar la configuración sin control de flujo
+# por excepciones (importa si algún día se recarga la config en caliente).
+_WINDOW_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+_DAYS_RANGE_RE = re.compile(r"^\s*([0-6])\s*-\s*([0-6])\s*$")
+
+
+def _parse_trading_window(window):
+    """
+    Parsea una ventana "HH:MM-HH:MM" a un par de datetime.time.
+
+    Returns:
+        Tupla (apertura, cierre) o None si el formato es inválido.
+    """
+    match = _WINDOW_RE.match(window)
+    if match:
+        start_h, start_m, end_h, end_m = (int(group) for group in match.groups())
+        if start_h < 24 and end_h < 24 and start_m < 60 and end_m < 60:
+            return dtime(start_h, start_m), dtime(end_h, end_m)
+    logger.warning(f"Ventana de trading inválida: {window!r}")
+    return None
+
+
+def _parse_trading_days(days):
+    """
+    Parsea días de trading: "0-4" (rango) o "0,1,2,3,4" (lista).
+    0=Lunes ... 6=Domingo.
+
+    Returns:
+        Frozenset de días o None si el formato es inválido.
+    """
+    match = _DAYS_RANGE_RE.match(days)
+    if match:
+        start, end = int(match[1]), int(match[2])
+        parsed = frozenset(range(start, end + 1))
+        if parsed:
+            return parsed
+    else:
+        parts = [part.strip() for part in days.split(",")]
+        if parts and all(part.isdigit() and 0 <= int(part) <= 6 for part in parts):
+            return frozenset(int(part) for part in parts)
+    logger.warning(f"Días de trading inválidos: {days!r}")
+    return None
+
+
+# Ventana y días de trading, configurables por entorno y parseados una
+# sola vez en el import.
+TRADING_WINDOW = (
+    _parse_trading_window(os.getenv("PORTFOLIO_TRADING_WINDOW", ""))
+    if os.getenv("PORTFOLIO_TRADING_WINDOW")
+    else None
+) or (MARKET_OPEN, MARKET_CLOSE)
+
+TRADING_DAYS = (
+    _parse_trading_days(os.getenv("PORTFOLIO_TRADING_DAYS", ""))
+    if os.getenv("PORTFOLIO_TRADING_DAYS")
+    else None
+) or frozenset(range(5))
+
+# Precompilados para el hot path: máscara de 7 bits para el día y la
+# ventana como minutos-del-día (sin construir objetos time por chequeo).
+_TRADING_DAYS_MASK = sum(1 << day for day in TRADING_DAYS)
+_OPEN_MINUTE = TRADING_WINDOW[0].hour * 60 + TRADING_WINDOW[0].minute
+_CLOSE_MINUTE = TRADING_WINDOW[1].hour * 60 + TRADING_WINDOW[1].minute
+
+# Evita que dos generaciones corran a la vez dentro del mismo proceso
+# (p.ej. un disparo programado que se solapa con una corrida lenta anterior).
+_run_lock = threading.Lock()
+
+
+def main(period="6mo", user_id=None, skip_empty=True, emit_console=True, dry_run=False):
+    """
+    Genera reportes de portfolio usando el sistema multi-cliente.
+
+    Args:
+        period: Periodo de análisis histórico
+        user_id: UUID del usuario específico (None = todos)
+        skip_empty: Omitir usuarios sin assets
+        emit_console: Emitir banners/resumen por stdout. El worker lo
+            desactiva para no pagar un syscall (y un evento de logplex)
+            por línea en cada iteración.
+        dry_run: Solo listar el plan de trabajo (usuarios y tickers) sin
+            descargas de yfinance ni gráficos. Ignora ``user_id``.
+    """
+    if emit_console:
+        print("=" * 80)
+        print("GENERADOR DE REPORTES DE PORTFOLIO - SISTEMA MULTI-CLIENTE")
+        print("=" * 80)
+        print(f"\nPeriodo seleccionado: {period}")
+        print(f"Modo: {'Usuario específico' if user_id else 'Todos los usuarios'}")
+        print("\nIniciando generación de reportes...")
+        print("   - Leyendo usuarios desde Supabase")
+        print("   - Normalizando símbolos de tickers")
+        print("   - Obteniendo datos de yfinance")
+        print("   - Generando gráficos individuales")
+        print("   - Guardando en storage por usuario\n")
+
+    try:
+        # Obtener el procesador (instancia única por proceso)
+        processor = _get_processor()
+
+
+        # Procesar según el modo
+        if dry_run:
+            logger.info("Modo dry-run: calculando plan de trabajo...")
+            summary = processor.process_all_users(
+                period=period,
+                skip_if_no_assets=skip_empty,
+                dry_run=True
+            )
+        elif user_id:
+            # Modo: Usuario específico
+            logger.info(f"Procesando usuario: {user_id}")
+            result = processor.process_user(
+                user_id=user_id,
+                period=period,
+                skip_if_no_assets=skip_empty
+            )
+            
+            # Crear summary compatible
+            summary = {
+                "total_users": 1,
+                "successful": 1 if result['status'] == 'success' else 0,
+                "errors": 1 if result['status'] == 'error' else 0,
+                "skipped": 1 if result['status'] == 'skipped' else 0,
+                "details": [result]
+            }
+        else:
+            # Modo: Todos los usuarios
+            logger.info("Procesando todos los usuarios...")
+            summary = processor.process_all_users(
+                period=period,
+                skip_if_no_assets=skip_empty
+            )
+        
+        if emit_console:
+            # Mostrar resumen
+            print("\n" + "=" * 80)
+            print("RESUMEN DE GENERACIÓN")
+            print("=" * 80)
+            print(f"\nTotal usuarios:  {summary.get('total_users', 0)}")
+            print(f"Exitosos:        {summary.get('successful', 0)}")
+            print(f"Errores:         {summary.get('errors', 0)}")
+            print(f"Omitidos:        {summary.get('skipped', 0)}")
+
+            # Detalles por usuario
+            if summary.get('details'):
+                print("\nDetalles:")
+                # islice: no materializa una copia de la lista para imprimir 5
+                for detail in islice(summary.get('details') or (), 5):
+                    status_icon = "✓" if detail['status'] == 'success' else "✗" if detail['status'] == 'error' else "⊘"
+                    user_id_short = detail.get('user_id', 'N/A')[:8]
+                    portfolios = detail.get('portfolios_processed', 0)
+                    assets = detail.get('assets_processed', 0)
+                    print(f"  {status_icon} Usuario {user_id_short}... : {portfolios} portfolio(s), {assets} asset(s)")
+
+            print(f"\nReporte generado a las {time.strftime('%H:%M:%S')}")
+        else:
+            # Una sola línea agregada para el log del worker
+            logger.info(
+                "Generación completada: %d usuario(s), %d exitoso(s), %d error(es), %d omitido(s)",
+                summary.get('total_users', 0),
+                summary.get('successful', 0),
+                summary.get('errors', 0),
+                summary.get('skipped', 0),
+            )
+
+        # Retornar código de salida. Un dry-run no procesa usuarios (deja
+        # ``successful`` en 0 a propósito), así que si llegó hasta aquí el
+        # plan se calculó bien y el smoke test de CI espera código 0.
+        if dry_run:
+            return 0
+        return 0 if summary.get('successful', 0) > 0 else 1
+
+    except Exception as e:
+        if emit_console:
+            print(f"\nERROR: {e}")
+        logger.error(f"Error crítico: {e}", exc_info=True)
+        return 1
+
+
+def is_market_hours():
+    """
+    Verifica si estamos en horario de mercado (NYSE).
+    Horario: Lunes a Viernes, 9:30 AM - 4:00 PM ET
+    """
+    now = datetime.now(NY_TZ)
+
+    # Chequeo de día por máscara de bits (sin lookup de hash)
+    if not (_TRADING_DAYS_MASK >> now.weekday()) & 1:
+        return False
+
+    # Chequeo de ventana por minuto-del-día (sin construir objetos time)
+    minute_of_day = now.hour * 60 + now.minute
+    return _OPEN_MINUTE <= minute_of_day <= _CLOSE_MINUTE
+
+
+def run_worker(period="6mo", skip_empty=True):
+    """
+    Ejecuta el worker que genera reportes cada 15 minutos durante horario de mercado.
+    
+    Args:
+        period: Periodo de análisis
+        skip_empty: Omitir usuarios sin assets
+    """
+    logger.info("=" * 70)
+    logger.info("WORKER DE PORTFOLIO MANAGER INICIADO")
+    logger.info("=" * 70)
+    logger.info("Configuración:")
+    logger.info("  - Ejecutar cada 15 minutos durante horario de mercado")
+    logger.info("  - Horario: Lunes-Viernes 9:30 AM - 4:00 PM ET")
+    logger.info(f"  - Periodo: {period}")
+    logger.info(f"  - Omitir usuarios sin assets: {skip_empty}")
+    
+    # Ejecutar inmediatamente si estamos en horario de mercado
+    if is_market_hours():
+        logger.info("\n✓ Estamos en horario de mercado. Generando primer reporte...")
+        main(period=period, skip_empty=skip_empty, emit_console=False)
+    else:
+        logger.info("\n⊘ Fuera de horario de mercado. Esperando...")
+    
+    # Ejecución cada 15 minutos con aritmética monotónica pura: sin
+    # dependencia de `schedule` y sin despertares intermedios.
+    def scheduled_task():
+        # Guardia de reentrancia: si una corrida anterior sigue activa
+        # (yfinance lento, scraping con timeout), se salta este disparo en
+        # lugar de encolar ejecuciones duplicadas.
+        if not _run_lock.acquire(blocking=False):
+            logger.warning("Corrida anterior aún activa; saltando este disparo.")
+            return
+        try:
+            if is_market_hours():
+                logger.info("Ejecutando generación programada...")
+                main(period=period, skip_empty=skip_empty, emit_console=False)
+            else:
+                logger.info("⊘ Fuera de horario de mercado. Saltando ejecución.")
+        finally:
+            _run_lock.release()
+
+    interval_seconds = 15 * 60
+
+    logger.info("\n✓ Worker en ejecución. Presiona Ctrl+C para detener.\n")
+
+    # Esperar hasta el próximo job con Event.wait: cero CPU en reposo y
+    # apagado limpio ante SIGTERM.
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    next_run = time.monotonic() + interval_seconds
+
+    # Robustez para procesos de larga vida: reconstruir el procesador
+    # cada N iteraciones si se configura (0 = nunca).
+    try:
+        reset_every = int(os.getenv("PORTFOLIO_RESET_MANAGER_EVERY", "0"))
+    except ValueError:
+        reset_every = 0
+    iterations = 0
+
+    try:
+        while not stop_event.is_set():
+            remaining = next_run - time.monotonic()
+            if remaining > 0 and stop_event.wait(remaining):
+                break
+            next_run = time.monotonic() + interval_seconds
+            iterations += 1
+            if reset_every and iterations % reset_every == 0:
+                logger.info("Reiniciando procesador (iteración %d).", iterations)
+                _get_processor.cache_clear()
+            scheduled_task()
+    except KeyboardInterrupt:
+        pass
+
+    logger.info("\n⚠ Worker detenido.")
+    sys.exit(0)
+
+
+def run_legacy(period="6mo"):
+    """Genera un reporte con los datos hardcodeados de PORTFOLIO_CONFIG.
+
+    ⚠️ DEPRECATED: solo para compatibilidad con el sistema de usuario
+    único; usar ``main`` con datos dinámicos en su lugar.
+    """
+    print("=" * 80)
+    print("⚠️  MODO LEGACY - DATOS HARDCODEADOS")
+    print("=" * 80)
+    print(f"\nPeriodo seleccionado: {period}")
+    print("\n⚠️  Este script usa datos hardcodeados de config.PORTFOLIO_CONFIG")
+    print("   Considera migrar a generate_report.py para usar datos dinámicos.")
+    print("\nIniciando generación del reporte...")
+
+    try:
+        from portfolio_manager import PortfolioManager
+
+        manager = PortfolioManager()
+
+        # Generar el reporte completo (SIN pasar assets_data ni user_id)
+        report = manager.generate_full_report(period=period)
+
+        print("\n" + "=" * 80)
+        print("REPORTE GENERADO EXITOSAMENTE")
+        print("=" * 80)
+
+        summary = report.get("summary", {})
+        print(f"\nValor Total: ${summary.get('total_value', 0):,.2f}")
+        print(f"Cambio: {summary.get('total_change_percent', 0):+.2f}%")
+
+        market_overview = report.get("market_overview", {})
+        print("\nMarket Overview:")
+        for section, items in market_overview.items():
+            if isinstance(items, list):
+                print(f"   - {section}: {len(items)} elementos")
+
+        data_file = Path(__file__).parent / "data" / "portfolio_data.json"
+        print(f"\nDatos guardados en: {data_file}")
+
+        print(f"\nReporte generado a las {time.strftime('%H:%M:%S')}")
+        return 0
+
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+def parse_args(argv=None):
+    """Construye el parser de argumentos y parsea ``argv``."""
+    parser = argparse.ArgumentParser(
+        description="Genera reportes de portfolio desde Supabase",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos:
+  # Generar reportes para todos los usuarios
+  python generate_report.py
+  
+  # Con periodo específico
+  python generate_report.py --period 1y
+  
+  # Usuario específico
+  python generate_report.py --user-id 550e8400-e29b-41d4-a716-446655440000
+  
+  # Modo worker (cada 15 min en horario de mercado)
+  python generate_report.py --worker
+        """
+    )
+    
+    parser.add_argument(
+        '--period',
+        type=str,
+        default='6mo',
+        choices=['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', 'ytd', 'max'],
+        help='Periodo de análisis (default: 6mo)'
+    )
+    
+    parser.add_argument(
+        '--user-id',
+        type=str,
+        default=None,
+        help='Procesar solo un usuario específico (UUID)'
+    )
+    
+    parser.add_argument(
+        '--worker',
+        action='store_true',
+        help='Ejecutar en modo worker (cada 15 min durante horario de mercado)'
+    )
+    
+    parser.add_argument(
+        '--skip-empty',
+        action='store_true',
+        default=True,
+        help='Omitir usuarios sin assets (default: True)'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Solo listar usuarios y tickers planificados, sin descargar datos ni generar gráficos'
+    )
+
+    return parser.parse_args(argv)
+
+
+def cli(argv=None):
+    """Punto de entrada de línea de comandos."""
+    args = parse_args(argv)
+
+    if args.worker:
+        run_worker(period=args.period, skip_empty=args.skip_empty)
+        return 0
+
+    return main(
+        period=args.period,
+        user_id=args.user_id,
+        skip_empty=args.skip_empty,
+        dry_run=args.dry_run
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
+
@@ -0,0 +1,135 @@
+"""
+Utilidades compartidas del servicio HTTP del Portfolio Manager.
+
+Concentra las piezas reutilizables entre entrypoints del servicio
+(modelos de request, lógica de horario de mercado, parseo de timestamps
+y el lock inter-proceso de generación) para que cada entrypoint no
+re-declare lo mismo.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel
+
+from config import OUTPUT_FILES, get_logger
+
+try:
+    import ciso8601
+except ImportError:  # pragma: no cover - optional dependency
+    ciso8601 = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no disponible en Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# Zona horaria del mercado (NYSE). zoneinfo es stdlib, se cachea por
+# intérprete y evita el baile localize/normalize de pytz.
+MARKET_TZ = ZoneInfo("America/New_York")
+
+# Archivo local con el último reporte generado
+REPORT_PATH = Path(OUTPUT_FILES["portfolio_data"])
+
+# Lock inter-proceso para la generación del reporte
+GENERATION_LOCK_PATH = REPORT_PATH.with_suffix(".json.lock")
+
+
+class ProcessRequest(BaseModel):
+    """Parámetros para solicitar una regeneración del reporte."""
+
+    period: str = "6mo"
+    user_id: Optional[str] = None
+
+
+def market_is_open(now: Optional[datetime] = None) -> bool:
+    """
+    Verifica si el mercado (NYSE) está abierto.
+    Horario: Lunes a Viernes, 9:30 AM - 4:00 PM ET
+    """
+    if now is None:
+        now = datetime.now(MARKET_TZ)
+    else:
+        now = now.astimezone(MARKET_TZ)
+
+    if now.weekday() > 4:  # Sábado o Domingo
+        return False
+
+    market_open = now.replace(hour=9, minute=30, second=0, microsecond=0)
+    market_close = now.replace(hour=16, minute=0, second=0, microsecond=0)
+
+    return market_open <= now <= market_close
+
+
+def parse_generated_at(value: Any) -> Optional[datetime]:
+    """Convierte el campo ``generated_at`` del reporte a datetime UTC (tz-aware).
+
+    Usa ``ciso8601`` (parser C, cientos de ns por llamada) cuando está
+    disponible; cae a ``datetime.fromisoformat`` si no lo está.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        if ciso8601 is not None:
+            parsed = ciso8601.parse_datetime(value)
+        else:
+            parsed = datetime.fromisoformat(value)
+    except ValueError:
+        logger.debug("generated_at con formato inválido: %s", value)
+        return None
+
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+@contextmanager
+def generation_file_lock(timeout: float = 60.0) -> Iterator[bool]:
+    """
+    Lock inter-proceso alrededor de la generación del reporte.
+
+    Aun si se lanzan dos procesos del servicio sobre el mismo JSON, solo
+    uno puede generar a la vez. Produce ``True`` si se obtuvo el lock,
+    ``False`` si se agotó el timeout (el llamador decide si continuar).
+    En plataformas sin ``fcntl`` el lock es un no-op.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    GENERATION_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    with open(GENERATION_LOCK_PATH, "w") as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    logger.warning("Timeout esperando el lock de generación.")
+                    yield False
+                    return
+                time.sleep(0.5)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+__all__ = [
+    "MARKET_TZ",
+    "REPORT_PATH",
+    "GENERATION_LOCK_PATH",
+    "ProcessRequest",
+    "market_is_open",
+    "parse_generated_at",
+    "generation_file_lock",
+]
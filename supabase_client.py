@@ -194,6 +194,56 @@ class SupabaseDBClient:
             logger.error(f"Error al obtener datos completos del usuario {user_id}: {e}")
             raise
 
+    def get_portfolios_with_assets_bulk(
+        self, user_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Obtiene los portfolios (con sus assets embebidos) de varios usuarios
+        en una sola query, usando el join implícito de PostgREST.
+
+        Evita el patrón N+1 de una query de portfolios + una de assets por
+        usuario: el resultado se agrupa client-side por user_id.
+
+        Args:
+            user_ids: Lista de UUIDs de usuarios
+
+        Returns:
+            Diccionario {user_id: [{"portfolio_info": {...}, "assets": [...]}]}
+        """
+        grouped: Dict[str, List[Dict[str, Any]]] = {user_id: [] for user_id in user_ids}
+
+        if not user_ids:
+            return grouped
+
+        try:
+            client = self._get_client()
+            response = (
+                client.table("portfolios")
+                .select("*, assets(*)")
+                .in_("user_id", user_ids)
+                .execute()
+            )
+
+            for portfolio in response.data or []:
+                user_id = portfolio.get("user_id")
+                if user_id not in grouped:
+                    continue
+
+                assets = portfolio.pop("assets", []) or []
+                grouped[user_id].append({
+                    "portfolio_info": portfolio,
+                    "assets": assets,
+                })
+
+            logger.info(
+                f"Fetch masivo: portfolios de {len(user_ids)} usuario(s) en una sola query."
+            )
+            return grouped
+
+        except Exception as e:
+            logger.error(f"Error en fetch masivo de portfolios: {e}")
+            raise
+
     def get_all_users_with_portfolios(self) -> List[Dict[str, Any]]:
         """
         Obtiene todos los usuarios con sus portfolios y assets.
@@ -3,10 +3,10 @@ from __future__ import annotations
 
 import json
 import logging
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from mimetypes import guess_type
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from config import SupabaseConfig
 
@@ -203,44 +203,43 @@ class SupabaseStorage:
             data: Datos del portfolio a guardar
             user_id: UUID del usuario. Si se proporciona, guarda en {user_id}/Informes/
         """
+        payload = json.dumps(data, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+        self.save_portfolio_json_bytes(payload, user_id)
+
+    def save_portfolio_json_bytes(self, payload: bytes, user_id: Optional[str] = None) -> None:
+        """
+        Sube un JSON ya serializado sin pasar por archivo temporal.
+
+        Permite que el llamador serialice una sola vez y reutilice los
+        mismos bytes para Supabase y para el fallback local.
+
+        Args:
+            payload: JSON codificado en UTF-8
+            user_id: UUID del usuario. Si se proporciona, guarda en {user_id}/Informes/
+        """
         if not self._is_enabled():
             raise RuntimeError("Supabase deshabilitado; no se puede guardar remotamente.")
 
         bucket = self._get_bucket()
         path = SupabaseConfig.portfolio_json_path(user_id)
 
-        temp_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
-        try:
-            json.dump(data, temp_file, ensure_ascii=False, indent=2, default=str)
-            temp_file.flush()
-            temp_path = Path(temp_file.name)
-        finally:
-            temp_file.close()
-
         logger.info(
             "Subiendo JSON del portafolio a Supabase: %s/%s",
             SupabaseConfig.SUPABASE_BUCKET_NAME,
             path,
         )
 
-        try:
-            with open(temp_path, "rb") as file_obj:
-                response = bucket.upload(
-                    path,
-                    file_obj,
-                    {
-                        "content-type": "application/json",
-                        "upsert": "true",
-                    },
-                )
-            error_message = self._extract_error(response)
-            if error_message:
-                raise RuntimeError(error_message)
-        finally:
-            try:
-                temp_path.unlink(missing_ok=True)
-            except Exception:  # pragma: no cover - limpieza best effort
-                pass
+        response = bucket.upload(
+            path,
+            payload,
+            {
+                "content-type": "application/json",
+                "upsert": "true",
+            },
+        )
+        error_message = self._extract_error(response)
+        if error_message:
+            raise RuntimeError(error_message)
 
     def upload_png_bytes(self, png_bytes: bytes, remote_path: str) -> Optional[Dict[str, str]]:
         """
@@ -358,6 +357,47 @@ class SupabaseStorage:
 
         return result
 
+    def upload_chart_assets(
+        self,
+        local_paths: List[Path],
+        user_id: Optional[str] = None,
+    ) -> Dict[Path, Optional[Dict[str, str]]]:
+        """
+        Sube varios archivos de gráficos solapando las peticiones HTTP.
+
+        Storage no expone un endpoint batch, así que el ahorro viene de
+        ejecutar los uploads individuales en paralelo (cada uno es una
+        petición httpx independiente y sin estado compartido) en lugar de
+        pagar la latencia de red archivo por archivo.
+
+        Args:
+            local_paths: Rutas locales de los archivos a subir
+            user_id: UUID del usuario (mismo semántica que upload_chart_asset)
+
+        Returns:
+            Diccionario {ruta_local: remote_info o None si falló esa subida}
+        """
+        if not local_paths or not self._is_enabled():
+            return {}
+
+        # Inicializar cliente y bucket ANTES de lanzar los threads para que
+        # la creación perezosa no corra en paralelo.
+        try:
+            self._get_bucket()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("No se pudo inicializar Supabase para subida batch: %s", exc)
+            return {}
+
+        def _upload(path: Path) -> Optional[Dict[str, str]]:
+            try:
+                return self.upload_chart_asset(path, user_id)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("No se pudo subir gráfico a Supabase (%s): %s", path, exc)
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(4, len(local_paths))) as executor:
+            return dict(zip(local_paths, executor.map(_upload, local_paths)))
+
     def download_chart_asset(self, remote_path: str) -> Optional[bytes]:
         if not self._is_enabled():
             logger.debug("Supabase deshabilitado; no se descarga %s", remote_path)